@@ -1,67 +1,86 @@
-from fastapi import Header, HTTPException, Request, Response, status
+from fastapi import Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 import httpx
+from app.services.user_service import InvalidToken, TokenVerifier
 
-USER_SERVICE_URL = "http://user_service:8000"
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+}
 
 async def get_user_id(x_user_id: str = Header(...)):
     return x_user_id
 
 async def proxy_request(request: Request, path: str):
-    async with httpx.AsyncClient() as client:
-        target_url = f"{USER_SERVICE_URL}/{path}"
-        try:
-            response = await client.request(
-                request.method,
-                target_url,
-                headers=dict(request.headers),
-                content=await request.body()
-            )
-            return Response(
-                content=response.content,
-                status_code=response.status_code,
-                headers=dict(response.headers)
-            )
-        except httpx.ConnectError:
-            raise HTTPException(status_code=503, detail="user_service is unavailable")
+    client: httpx.AsyncClient = request.app.state.user_service_client
+    headers = [
+        (key, value) for key, value in request.headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    ]
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+    upstream_request = client.build_request(
+        request.method,
+        f"/{path}",
+        params=request.query_params,
+        headers=headers,
+        content=request.stream() if has_body else None
+    )
+    try:
+        response = await client.send(upstream_request, stream=True)
+    except httpx.ConnectError:
+        raise HTTPException(status_code=503, detail="user_service is unavailable")
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="user_service timeout")
+
+    proxied = StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        background=BackgroundTask(response.aclose)
+    )
+    # Raw items keep repeated headers such as Set-Cookie intact
+    proxied.raw_headers = [
+        (key.encode("latin-1"), value.encode("latin-1"))
+        for key, value in response.headers.multi_items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    ]
+    return proxied
 
 async def auth_user(request: Request) -> str:
-    async with httpx.AsyncClient() as client:
-        try:
-            cookies = dict(request.cookies)
-            
-            response = await client.get(
-                f"{USER_SERVICE_URL}/auth/auth",
-                cookies=cookies,
-                timeout=5.0
-            )
-            
-            if response.status_code == status.HTTP_200_OK:
-                try:
-                    return response.text
-                except ValueError:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail="Invalid response format from user service"
-                    )
-            
-            if response.status_code == status.HTTP_401_UNAUTHORIZED:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid authentication credentials"
-                )
-                
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"User service error: {response.text}"
-            )
-                
-        except httpx.ConnectError:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="User service is unavailable"
-            )
-        except httpx.TimeoutException:
-            raise HTTPException(
-                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-                detail="User service timeout"
-            )
\ No newline at end of file
+    token = request.cookies.get("users_access_token")
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+
+    verifier: TokenVerifier = request.app.state.token_verifier
+    try:
+        return await verifier.verify(token)
+    except InvalidToken:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    except httpx.ConnectError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="User service is unavailable"
+        )
+    except httpx.TimeoutException:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="User service timeout"
+        )
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"User service error: {e.response.text}"
+        )
\ No newline at end of file
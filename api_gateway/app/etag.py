@@ -0,0 +1,59 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+from fastapi import Response
+
+# Responses depend on the caller (private posts), so only the client may cache them,
+# and it has to revalidate with If-None-Match every time
+CACHE_CONTROL = "private, max-age=0, must-revalidate"
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Microseconds of updated_at (created_at for never updated posts), same as post_service's expected_version
+def post_version(post) -> int:
+    if post.HasField("created_at_ts"):
+        return (post.updated_at_ts if post.HasField("updated_at_ts") else post.created_at_ts).ToMicroseconds()
+    timestamp = datetime.fromisoformat(post.updated_at or post.created_at)
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+def post_etag(post) -> str:
+    return f'"{post.id}.{post_version(post)}"'
+
+# Content hash over the version of every post plus the paging fields
+def list_etag(posts, *extra) -> str:
+    digest = hashlib.sha1()
+    for post in posts:
+        digest.update(f"{post.id}.{post_version(post)};".encode())
+    digest.update(repr(extra).encode())
+    return f'"{digest.hexdigest()}"'
+
+def _tags(header: str) -> Iterable[str]:
+    for tag in header.split(","):
+        tag = tag.strip()
+        yield tag[2:] if tag.startswith("W/") else tag
+
+# If-None-Match uses weak comparison
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    return header.strip() == "*" or etag in _tags(header)
+
+# Version required by If-Match for this post; None when any version will do.
+# Raises ValueError when no tag in the header can refer to this post. If-Match uses
+# strong comparison, so weak tags never match.
+def if_match_version(header: Optional[str], post_id: str) -> Optional[int]:
+    if not header or header.strip() == "*":
+        return None
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            continue
+        tag_post_id, _, version = tag.strip('"').rpartition(".")
+        if tag_post_id == post_id and version.isdigit():
+            return int(version)
+    raise ValueError("If-Match does not match the post")
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
\ No newline at end of file
@@ -1,7 +1,34 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.routers import posts, users
+from app.services.events import EventBuffer, create_event_sink
+from app.services.post_service import PostServiceClient
+from app.services.statistics_service import create_statistics_client
+from app.services.user_service import TokenVerifier, UserLoader, create_user_service_client
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.post_service = PostServiceClient()
+    app.state.user_service_client = create_user_service_client()
+    app.state.token_verifier = TokenVerifier(app.state.user_service_client)
+    app.state.token_verifier.revocations.start()
+    app.state.user_loader = UserLoader(app.state.user_service_client)
+    app.state.statistics_client = create_statistics_client()
+    app.state.event_buffer = EventBuffer(create_event_sink(app.state.statistics_client))
+    app.state.event_buffer.start()
+    yield
+    await app.state.event_buffer.close()
+    logger.info("View events: %s", app.state.event_buffer.stats())
+    await app.state.statistics_client.aclose()
+    await app.state.token_verifier.revocations.close()
+    await app.state.user_loader.close()
+    await app.state.post_service.close()
+    await app.state.user_service_client.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(users.router)
 app.include_router(posts.router)
\ No newline at end of file
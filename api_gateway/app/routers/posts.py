@@ -1,11 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from typing import List, Literal, Optional
 import grpc
-from app.schemas import PostCreate, PostUpdate, PostResponse, PostListResponse
+import httpx
+import post_service_pb2
+from app.schemas import (
+    CommentCreate, CommentListResponse, CommentResponse, LikeResponse, PostCreate, PostUpdate, PostResponse, PostListResponse,
+    TrendingResponse
+)
 from app.dependencies import auth_user
+from app.etag import cache_headers, etag_matches, if_match_version, list_etag, not_modified, post_etag
+from app.serialization import (
+    comment_list_response, comment_to_dict, json_response, post_list_response, post_response, post_to_dict
+)
+from app.services.events import EventBuffer, get_event_buffer, view_event
 from app.services.post_service import PostServiceClient, get_post_service
+from app.services.statistics_service import get_statistics_client, get_trending
+from app.services.user_service import UserLoader, UserServiceUnavailable, get_user_loader
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
+TOTAL_STRATEGIES = {
+    "exact": post_service_pb2.TOTAL_EXACT,
+    "cached": post_service_pb2.TOTAL_CACHED,
+    "estimated": post_service_pb2.TOTAL_ESTIMATED,
+    "none": post_service_pb2.TOTAL_NONE,
+}
+MAX_TRENDING_LIMIT = 50
+# Most ids one BatchGetPosts call accepts
+MAX_TRENDING_CANDIDATES = 100
+
 @router.post("/", response_model=PostResponse)
 async def create_post(
     post_data: PostCreate,
@@ -20,21 +43,95 @@ async def create_post(
             is_private=post_data.is_private,
             tags=post_data.tags
         )
-        post_dict = PostServiceClient._grpc_post_to_dict(response.post)
-        return PostResponse(**post_dict)
+        return post_response(response.post)
+    except grpc.RpcError as e:
+        raise HTTPException(status_code=400, detail=e.details())
+
+# Declared before /{post_id} so "search" is not taken for a post id
+@router.get("/search", response_model=PostListResponse)
+async def search_posts(
+    q: str,
+    page_size: int = 10,
+    cursor: Optional[str] = None,
+    include_authors: bool = False,
+    user_id: str = Depends(auth_user),
+    post_service: PostServiceClient = Depends(get_post_service),
+    user_loader: UserLoader = Depends(get_user_loader)
+):
+    try:
+        response = await post_service.search_posts(
+            query=q,
+            user_id=user_id,
+            page_size=page_size,
+            page_token=cursor or ""
+        )
     except grpc.RpcError as e:
         raise HTTPException(status_code=400, detail=e.details())
+    return post_list_response(
+        response.posts,
+        page=0,
+        page_size=page_size,
+        next_cursor=response.next_page_token or None,
+        authors=await load_authors(response.posts, include_authors, user_loader)
+    )
+
+# Also before /{post_id}
+@router.get("/trending", response_model=TrendingResponse)
+async def trending_posts(
+    metric: Literal["views", "likes"] = "views",
+    limit: int = Query(10, ge=1, le=MAX_TRENDING_LIMIT),
+    user_id: str = Depends(auth_user),
+    post_service: PostServiceClient = Depends(get_post_service),
+    statistics_client: httpx.AsyncClient = Depends(get_statistics_client)
+):
+    # Deleted posts and other users' private posts are skipped, so ask for more than limit
+    try:
+        trending = await get_trending(statistics_client, metric, min(limit * 2, MAX_TRENDING_CANDIDATES))
+    except httpx.HTTPError:
+        raise HTTPException(status_code=503, detail="Statistics service unavailable")
+    candidates = trending["posts"]
+    posts = {}
+    if candidates:
+        try:
+            response = await post_service.batch_get_posts(
+                post_ids=[candidate["post_id"] for candidate in candidates],
+                user_id=user_id
+            )
+        except grpc.RpcError as e:
+            raise HTTPException(status_code=400, detail=e.details())
+        posts = {post.id: post for post in response.posts}
+    items = [
+        {
+            "post": post_to_dict(posts[candidate["post_id"]]),
+            "count": candidate["count"],
+            "error": candidate["error"],
+            "missing": candidate["missing"]
+        }
+        for candidate in candidates
+        if candidate["post_id"] in posts
+    ]
+    return json_response({
+        "metric": trending["metric"],
+        "window_seconds": trending["window_seconds"],
+        "posts": items[:limit]
+    })
 
 @router.get("/{post_id}", response_model=PostResponse)
 async def get_post(
     post_id: str,
+    if_none_match: Optional[str] = Header(None),
     user_id: str = Depends(auth_user),
-    post_service: PostServiceClient = Depends(get_post_service)
+    post_service: PostServiceClient = Depends(get_post_service),
+    event_buffer: EventBuffer = Depends(get_event_buffer)
 ):
     try:
         response = await post_service.get_post(post_id=post_id, user_id=user_id)
-        post_dict = PostServiceClient._grpc_post_to_dict(response.post)
-        return PostResponse(**post_dict)
+        # Only buffered here; sent to statistics in the background
+        event_buffer.emit(view_event(post_id, user_id))
+        etag = post_etag(response.post)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return post_response(response.post, headers=cache_headers(etag))
     except grpc.RpcError as e:
         if e.code() == grpc.StatusCode.NOT_FOUND:
             raise HTTPException(status_code=404, detail="Post not found")
@@ -46,28 +143,32 @@ async def get_post(
 async def update_post(
     post_id: str,
     post_data: PostUpdate,
+    if_match: Optional[str] = Header(None),
     user_id: str = Depends(auth_user),
     post_service: PostServiceClient = Depends(get_post_service)
 ):
     try:
-        current_post = await post_service.get_post(post_id=post_id, user_id=user_id)
-        current_data = current_post.post
-        
+        expected_version = if_match_version(if_match, post_id)
+    except ValueError:
+        raise HTTPException(status_code=412, detail="Precondition failed")
+    try:
+        # Fields left out of the body are kept; post_service merges them in a single UPDATE
+        fields = post_data.model_dump(exclude_none=True)
         response = await post_service.update_post(
             post_id=post_id,
-            title=post_data.title if post_data.title is not None else current_data.title,
-            description=post_data.description if post_data.description is not None else current_data.description,
-            is_private=post_data.is_private if post_data.is_private is not None else current_data.is_private,
-            tags=post_data.tags if post_data.tags is not None else current_data.tags,
-            user_id=user_id
+            user_id=user_id,
+            update_mask=list(fields),
+            expected_version=expected_version or 0,
+            **fields
         )
-        post_dict = PostServiceClient._grpc_post_to_dict(response.post)
-        return PostResponse(**post_dict)
+        return post_response(response.post, headers=cache_headers(post_etag(response.post)))
     except grpc.RpcError as e:
         if e.code() == grpc.StatusCode.NOT_FOUND:
             raise HTTPException(status_code=404, detail="Post not found")
         elif e.code() == grpc.StatusCode.PERMISSION_DENIED:
             raise HTTPException(status_code=403, detail="Permission denied")
+        elif e.code() == grpc.StatusCode.FAILED_PRECONDITION:
+            raise HTTPException(status_code=412, detail="Precondition failed")
         raise HTTPException(status_code=400, detail=e.details())
 
 @router.delete("/{post_id}")
@@ -86,20 +187,188 @@ async def delete_post(
             raise HTTPException(status_code=403, detail="Permission denied")
         raise HTTPException(status_code=400, detail=e.details())
 
+@router.post("/{post_id}/like", response_model=LikeResponse)
+async def like_post(
+    post_id: str,
+    user_id: str = Depends(auth_user),
+    post_service: PostServiceClient = Depends(get_post_service)
+):
+    try:
+        response = await post_service.like_post(post_id=post_id, user_id=user_id)
+        return LikeResponse(liked=True, likes=response.likes)
+    except grpc.RpcError as e:
+        raise like_error(e)
+
+@router.delete("/{post_id}/like", response_model=LikeResponse)
+async def unlike_post(
+    post_id: str,
+    user_id: str = Depends(auth_user),
+    post_service: PostServiceClient = Depends(get_post_service)
+):
+    try:
+        response = await post_service.unlike_post(post_id=post_id, user_id=user_id)
+        return LikeResponse(liked=False, likes=response.likes)
+    except grpc.RpcError as e:
+        raise like_error(e)
+
+@router.get("/{post_id}/likes", response_model=LikeResponse)
+async def get_likes(
+    post_id: str,
+    user_id: str = Depends(auth_user),
+    post_service: PostServiceClient = Depends(get_post_service)
+):
+    try:
+        response = await post_service.get_like_counts(post_ids=[post_id], user_id=user_id)
+    except grpc.RpcError as e:
+        raise like_error(e)
+    if not response.counts:
+        raise HTTPException(status_code=404, detail="Post not found")
+    count = response.counts[0]
+    return LikeResponse(liked=count.liked, likes=count.likes)
+
+def like_error(e: grpc.RpcError) -> HTTPException:
+    if e.code() == grpc.StatusCode.NOT_FOUND:
+        return HTTPException(status_code=404, detail="Post not found")
+    elif e.code() == grpc.StatusCode.PERMISSION_DENIED:
+        return HTTPException(status_code=403, detail="Permission denied")
+    return HTTPException(status_code=400, detail=e.details())
+
+@router.post("/{post_id}/comments", response_model=CommentResponse)
+async def create_comment(
+    post_id: str,
+    comment_data: CommentCreate,
+    user_id: str = Depends(auth_user),
+    post_service: PostServiceClient = Depends(get_post_service)
+):
+    try:
+        response = await post_service.create_comment(
+            post_id=post_id,
+            user_id=user_id,
+            content=comment_data.content,
+            parent_id=comment_data.parent_id or ""
+        )
+        return json_response(comment_to_dict(response))
+    except grpc.RpcError as e:
+        raise comment_error(e)
+
+# The whole thread, or the subtree under parent_id, in thread order; max_depth=1 pages
+# through a single level of replies
+@router.get("/{post_id}/comments", response_model=CommentListResponse)
+async def list_comments(
+    post_id: str,
+    parent_id: Optional[str] = None,
+    max_depth: int = Query(0, ge=0),
+    page_size: int = 20,
+    cursor: Optional[str] = None,
+    user_id: str = Depends(auth_user),
+    post_service: PostServiceClient = Depends(get_post_service)
+):
+    try:
+        response = await post_service.list_comments(
+            post_id=post_id,
+            user_id=user_id,
+            parent_id=parent_id or "",
+            page_size=page_size,
+            page_token=cursor or "",
+            max_depth=max_depth
+        )
+    except grpc.RpcError as e:
+        raise comment_error(e)
+    return comment_list_response(response.comments, next_cursor=response.next_page_token or None)
+
+def comment_error(e: grpc.RpcError) -> HTTPException:
+    if e.code() == grpc.StatusCode.NOT_FOUND:
+        return HTTPException(status_code=404, detail=e.details())
+    elif e.code() == grpc.StatusCode.PERMISSION_DENIED:
+        return HTTPException(status_code=403, detail="Permission denied")
+    return HTTPException(status_code=400, detail=e.details())
+
 @router.get("/", response_model=PostListResponse)
 async def list_posts(
     page: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    ids: Optional[List[str]] = Query(None),
+    tags_any: Optional[List[str]] = Query(None),
+    tags_all: Optional[List[str]] = Query(None),
+    total: Optional[Literal["exact", "cached", "estimated", "none"]] = None,
+    view: Literal["full", "compact"] = "full",
+    include_authors: bool = False,
+    if_none_match: Optional[str] = Header(None),
     user_id: str = Depends(auth_user),
-    post_service: PostServiceClient = Depends(get_post_service)
+    post_service: PostServiceClient = Depends(get_post_service),
+    user_loader: UserLoader = Depends(get_user_loader)
 ):
+    authors_loader = user_loader if include_authors else None
+    if ids:
+        return await get_posts_by_ids(ids, user_id, post_service, if_none_match, authors_loader)
+
+    # page=0 or a cursor switches to keyset pagination
+    if cursor:
+        page = 0
     try:
-        response = await post_service.list_posts(page=page, page_size=page_size, user_id=user_id)
-        return PostListResponse(
-            posts=[PostResponse(**PostServiceClient._grpc_post_to_dict(post)) for post in response.posts],
-            total=response.total,
-            page=response.page,
-            page_size=response.page_size
+        response = await post_service.list_posts(
+            page=page,
+            page_size=page_size,
+            user_id=user_id,
+            page_token=cursor or "",
+            include_total=include_total,
+            tags_any=tags_any,
+            tags_all=tags_all,
+            total_strategy=TOTAL_STRATEGIES.get(total, post_service_pb2.TOTAL_DEFAULT),
+            view=post_service_pb2.VIEW_COMPACT if view == "compact" else post_service_pb2.VIEW_FULL
         )
     except grpc.RpcError as e:
-        raise HTTPException(status_code=400, detail=e.details())
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=e.details())
+
+    total_value = response.total if response.HasField("total") else None
+    etag = list_etag(
+        response.posts, view, include_authors, total_value, response.page, response.page_size, response.next_page_token
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return post_list_response(
+        response.posts,
+        total=total_value,
+        page=response.page,
+        page_size=response.page_size,
+        next_cursor=response.next_page_token or None,
+        headers=cache_headers(etag),
+        compact=view == "compact",
+        authors=await load_authors(response.posts, include_authors, user_loader)
+    )
+
+async def get_posts_by_ids(
+    ids: List[str],
+    user_id: str,
+    post_service: PostServiceClient,
+    if_none_match: Optional[str] = None,
+    user_loader: Optional[UserLoader] = None
+):
+    # Accept both ?ids=a&ids=b and ?ids=a,b
+    post_ids = [post_id for value in ids for post_id in value.split(",") if post_id]
+    try:
+        response = await post_service.batch_get_posts(post_ids=post_ids, user_id=user_id)
+    except grpc.RpcError as e:
+        raise HTTPException(status_code=400, detail=e.details())
+    etag = list_etag(response.posts, user_loader is not None)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return post_list_response(
+        response.posts,
+        total=len(response.posts),
+        page=1,
+        page_size=len(response.posts),
+        headers=cache_headers(etag),
+        authors=await load_authors(response.posts, user_loader is not None, user_loader)
+    )
+
+async def load_authors(posts, include_authors: bool, user_loader: UserLoader) -> Optional[dict]:
+    if not include_authors:
+        return None
+    try:
+        return await user_loader.load_many(post.creator_id for post in posts)
+    except UserServiceUnavailable:
+        # Posts are still served without authors while user_service is unavailable
+        return {}
\ No newline at end of file
@@ -15,6 +15,10 @@ async def login_user(request: Request):
 async def login_user(request: Request):
     return await proxy_request(request, "auth/logout")
 
+@router.post("/auth/logout-all")
+async def logout_all(request: Request):
+    return await proxy_request(request, "auth/logout-all")
+
 @router.get("/me")
 async def get_current_user(request: Request):
     return await proxy_request(request, "users/me")
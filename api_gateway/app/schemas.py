@@ -13,18 +13,60 @@ class PostUpdate(BaseModel):
     is_private: Optional[bool] = None
     tags: Optional[List[str]] = None
 
+class AuthorResponse(BaseModel):
+    id: str
+    username: str
+
 class PostResponse(BaseModel):
     id: str
     title: str
-    description: str
+    # Left out of list responses with view=compact
+    description: Optional[str] = None
     creator_id: str
     created_at: str
     updated_at: str
     is_private: bool
     tags: List[str]
+    # Only with include_authors=true; null when the user can't be resolved
+    author: Optional[AuthorResponse] = None
 
 class PostListResponse(BaseModel):
     posts: List[PostResponse]
-    total: int
+    total: Optional[int] = None
     page: int
-    page_size: int
\ No newline at end of file
+    page_size: int
+    next_cursor: Optional[str] = None
+
+class LikeResponse(BaseModel):
+    liked: bool
+    likes: int
+
+class CommentCreate(BaseModel):
+    content: str
+    # Reply to this comment; top-level comment when left out
+    parent_id: Optional[str] = None
+
+class CommentResponse(BaseModel):
+    id: str
+    post_id: str
+    parent_id: Optional[str] = None
+    user_id: str
+    content: str
+    created_at: str
+    depth: int
+
+class CommentListResponse(BaseModel):
+    comments: List[CommentResponse]
+    next_cursor: Optional[str] = None
+
+class TrendingPostResponse(BaseModel):
+    post: PostResponse
+    # Views or likes within the window; the true number lies in [count - error, count + missing]
+    count: int
+    error: int
+    missing: int
+
+class TrendingResponse(BaseModel):
+    metric: str
+    window_seconds: float
+    posts: List[TrendingPostResponse]
\ No newline at end of file
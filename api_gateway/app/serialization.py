@@ -0,0 +1,82 @@
+from datetime import timezone
+from operator import attrgetter
+from typing import Dict, Iterable, Optional
+import orjson
+from fastapi import Response
+import post_service_pb2
+from app.schemas import PostResponse
+
+# Protobuf messages are already typed, so post responses skip pydantic validation and
+# jsonable_encoder and are written with orjson. PostResponse stays the documented schema;
+# its fields are resolved against the proto once, at import time.
+def _field_getter(name: str):
+    default = getattr(post_service_pb2.Post(), name)
+    if f"{name}_ts" in post_service_pb2.Post.DESCRIPTOR.fields_by_name:
+        return _timestamp_getter(name)
+    if not isinstance(default, (str, bool, int, float)):
+        # Repeated fields come back as protobuf containers, which orjson can't encode
+        return lambda post: list(getattr(post, name))
+    return attrgetter(name)
+
+# Compact views only carry the Timestamp; the string is formatted here, off post_service
+def _timestamp_getter(name: str):
+    ts_name = f"{name}_ts"
+    def get(post):
+        value = getattr(post, name)
+        if value or not post.HasField(ts_name):
+            return value
+        return getattr(post, ts_name).ToDatetime(tzinfo=timezone.utc).isoformat()
+    return get
+
+POST_FIELDS = tuple(
+    (name, _field_getter(name))
+    for name in PostResponse.model_fields
+    if name in post_service_pb2.Post.DESCRIPTOR.fields_by_name
+)
+COMPACT_POST_FIELDS = tuple((name, get) for name, get in POST_FIELDS if name != "description")
+
+def post_to_dict(post, fields=POST_FIELDS) -> dict:
+    return {name: get(post) for name, get in fields}
+
+def json_response(content, headers: Optional[dict] = None) -> Response:
+    return Response(content=orjson.dumps(content), media_type="application/json", headers=headers)
+
+def post_response(post, headers: Optional[dict] = None) -> Response:
+    return json_response(post_to_dict(post), headers)
+
+def post_list_response(
+    posts: Iterable,
+    page: int,
+    page_size: int,
+    total: Optional[int] = None,
+    next_cursor: Optional[str] = None,
+    headers: Optional[dict] = None,
+    compact: bool = False,
+    authors: Optional[Dict[str, Optional[dict]]] = None
+) -> Response:
+    fields = COMPACT_POST_FIELDS if compact else POST_FIELDS
+    items = [post_to_dict(post, fields) for post in posts]
+    if authors is not None:
+        for item in items:
+            item["author"] = authors.get(item["creator_id"])
+    return json_response({
+        "posts": items,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": next_cursor
+    }, headers)
+
+def comment_to_dict(comment) -> dict:
+    return {
+        "id": comment.id,
+        "post_id": comment.post_id,
+        "parent_id": comment.parent_id or None,
+        "user_id": comment.user_id,
+        "content": comment.content,
+        "created_at": comment.created_at.ToDatetime(tzinfo=timezone.utc).isoformat(),
+        "depth": comment.depth
+    }
+
+def comment_list_response(comments: Iterable, next_cursor: Optional[str] = None) -> Response:
+    return json_response({"comments": [comment_to_dict(comment) for comment in comments], "next_cursor": next_cursor})
\ No newline at end of file
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import Request
+
+EVENT_SINK = os.getenv("EVENT_SINK", "log")
+EVENT_FILE_PATH = os.getenv("EVENT_FILE_PATH", "events.ndjson")
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "10000"))
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "500"))
+EVENT_FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", "1.0"))
+
+logger = logging.getLogger(__name__)
+
+def view_event(post_id: str, user_id: str) -> dict:
+    return {
+        "type": "view",
+        "post_id": post_id,
+        "user_id": user_id,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+class EventSink:
+    async def send(self, events: List[dict]):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class LogSink(EventSink):
+    async def send(self, events: List[dict]):
+        logger.debug("%d events: %s", len(events), json.dumps(events[-1]))
+
+class FileSink(EventSink):
+    def __init__(self, path: str):
+        self.path = path
+
+    async def send(self, events: List[dict]):
+        await asyncio.to_thread(self._append, events)
+
+    def _append(self, events: List[dict]):
+        with open(self.path, "a") as file:
+            file.writelines(json.dumps(event) + "\n" for event in events)
+
+# POSTs each batch to the statistics service's /events
+class HttpSink(EventSink):
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+
+    async def send(self, events: List[dict]):
+        response = await self.client.post("/events", json={"events": events})
+        response.raise_for_status()
+
+def create_event_sink(statistics_client: httpx.AsyncClient) -> EventSink:
+    if EVENT_SINK == "http":
+        return HttpSink(statistics_client)
+    if EVENT_SINK == "file":
+        return FileSink(EVENT_FILE_PATH)
+    if EVENT_SINK == "log":
+        return LogSink()
+    raise ValueError(f"Unknown EVENT_SINK: {EVENT_SINK}")
+
+# Fire-and-forget events for the request path. emit() only appends to a bounded buffer;
+# a background task sends full batches as soon as they fill up and whatever is left every
+# flush_interval. One batch is in flight at a time, so a slow sink makes the buffer fill
+# up and new events are dropped (and counted) instead of piling up in memory or slowing
+# requests down. Events are best effort: a batch the sink rejects is dropped too.
+class EventBuffer:
+    def __init__(
+        self,
+        sink: EventSink,
+        max_size: int = EVENT_BUFFER_SIZE,
+        batch_size: int = EVENT_BATCH_SIZE,
+        flush_interval: float = EVENT_FLUSH_INTERVAL
+    ):
+        self.sink = sink
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.emitted = 0
+        self.dropped = 0
+        self.failed = 0
+        self.sent = 0
+        self._events: List[dict] = []
+        self._batch_ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def emit(self, event: dict) -> bool:
+        if len(self._events) >= self.max_size:
+            self.dropped += 1
+            return False
+        self._events.append(event)
+        self.emitted += 1
+        if len(self._events) >= self.batch_size:
+            self._batch_ready.set()
+        return True
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        # Lets a batch already handed to the sink finish instead of losing it
+        self._closing = True
+        self._batch_ready.set()
+        if self._task is not None:
+            await self._task
+        await self.flush()
+        await self.sink.close()
+
+    async def flush(self, full_batches_only: bool = False):
+        while self._events:
+            if full_batches_only and len(self._events) < self.batch_size:
+                break
+            batch = self._events[:self.batch_size]
+            del self._events[:self.batch_size]
+            try:
+                await self.sink.send(batch)
+                self.sent += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.warning("Dropped %d events, sink failed: %s", len(batch), e)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "emitted": self.emitted,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "sent": self.sent,
+            "buffered": len(self._events)
+        }
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                timed_out = False
+            except asyncio.TimeoutError:
+                timed_out = True
+            self._batch_ready.clear()
+            await self.flush(full_batches_only=not timed_out)
+
+def get_event_buffer(request: Request) -> EventBuffer:
+    return request.app.state.event_buffer
\ No newline at end of file
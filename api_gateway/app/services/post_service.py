@@ -1,19 +1,50 @@
+import itertools
+import os
 import grpc
 import post_service_pb2
 import post_service_pb2_grpc
 
+from fastapi import Request
 from typing import List, Optional
 
-POST_SERVICE_GRPC_HOST = "post_service"
-POST_SERVICE_GRPC_PORT = 50051
+POST_SERVICE_GRPC_HOST = os.getenv("POST_SERVICE_GRPC_HOST", "post_service")
+POST_SERVICE_GRPC_PORT = int(os.getenv("POST_SERVICE_GRPC_PORT", "50051"))
+POST_SERVICE_CHANNEL_POOL_SIZE = int(os.getenv("POST_SERVICE_CHANNEL_POOL_SIZE", "4"))
+POST_SERVICE_TIMEOUT = float(os.getenv("POST_SERVICE_TIMEOUT", "5.0"))
 
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    # Each pooled channel opens its own connection instead of sharing one subchannel
+    ("grpc.use_local_subchannel_pool", 1),
+]
+
+# Shared for the whole app: calls are spread round-robin over a pool of aio channels
 class PostServiceClient:
-    def __init__(self):
-        self.channel = grpc.insecure_channel(f"{POST_SERVICE_GRPC_HOST}:{POST_SERVICE_GRPC_PORT}")
-        self.stub = post_service_pb2_grpc.PostServiceStub(self.channel)
+    def __init__(
+        self,
+        target: str = f"{POST_SERVICE_GRPC_HOST}:{POST_SERVICE_GRPC_PORT}",
+        pool_size: int = POST_SERVICE_CHANNEL_POOL_SIZE,
+        timeout: float = POST_SERVICE_TIMEOUT
+    ):
+        self.timeout = timeout
+        self.channels = [
+            grpc.aio.insecure_channel(target, options=CHANNEL_OPTIONS)
+            for _ in range(max(pool_size, 1))
+        ]
+        self._stubs = itertools.cycle(
+            [post_service_pb2_grpc.PostServiceStub(channel) for channel in self.channels]
+        )
+
+    @property
+    def stub(self):
+        return next(self._stubs)
 
-    def __del__(self):
-        self.channel.close()
+    async def close(self):
+        for channel in self.channels:
+            await channel.close()
 
     async def create_post(self, title: str, description: str, creator_id: str, is_private: bool = False, tags: List[str] = None):
         tags = tags or []
@@ -24,16 +55,26 @@ class PostServiceClient:
             is_private=is_private,
             tags=tags
         )
-        return self.stub.CreatePost(request)
+        return await self.stub.CreatePost(request, timeout=self.timeout)
 
     async def get_post(self, post_id: str, user_id: str):
         request = post_service_pb2.GetPostRequest(
             post_id=post_id,
             user_id=user_id
         )
-        return self.stub.GetPost(request)
+        return await self.stub.GetPost(request, timeout=self.timeout)
 
-    async def update_post(self, post_id: str, title: str, description: str, user_id: str, is_private: bool = False, tags: List[str] = None):
+    async def update_post(
+        self,
+        post_id: str,
+        user_id: str,
+        title: str = "",
+        description: str = "",
+        is_private: bool = False,
+        tags: List[str] = None,
+        update_mask: Optional[List[str]] = None,
+        expected_version: int = 0
+    ):
         tags = tags or []
         request = post_service_pb2.UpdatePostRequest(
             post_id=post_id,
@@ -41,25 +82,103 @@ class PostServiceClient:
             description=description,
             is_private=is_private,
             tags=tags,
-            user_id=user_id
+            user_id=user_id,
+            expected_version=expected_version
         )
-        return self.stub.UpdatePost(request)
+        if update_mask is not None:
+            # Only the listed fields are written; an empty mask is still sent as set
+            request.update_mask.SetInParent()
+            request.update_mask.paths.extend(update_mask)
+        return await self.stub.UpdatePost(request, timeout=self.timeout)
 
     async def delete_post(self, post_id: str, user_id: str):
         request = post_service_pb2.DeletePostRequest(
             post_id=post_id,
             user_id=user_id
         )
-        return self.stub.DeletePost(request)
+        return await self.stub.DeletePost(request, timeout=self.timeout)
 
-    async def list_posts(self, page: int = 1, page_size: int = 10, user_id: str = ""):
+    async def list_posts(
+        self,
+        page: int = 1,
+        page_size: int = 10,
+        user_id: str = "",
+        page_token: str = "",
+        include_total: bool = False,
+        tags_any: List[str] = None,
+        tags_all: List[str] = None,
+        total_strategy: int = post_service_pb2.TOTAL_DEFAULT,
+        view: int = post_service_pb2.VIEW_FULL
+    ):
         request = post_service_pb2.ListPostsRequest(
             page=page,
             page_size=page_size,
+            user_id=user_id,
+            page_token=page_token,
+            include_total=include_total,
+            tags_any=tags_any or [],
+            tags_all=tags_all or [],
+            total_strategy=total_strategy,
+            view=view
+        )
+        return await self.stub.ListPosts(request, timeout=self.timeout)
+
+    async def batch_get_posts(self, post_ids: List[str], user_id: str):
+        request = post_service_pb2.BatchGetPostsRequest(
+            post_ids=post_ids,
             user_id=user_id
         )
-        return self.stub.ListPosts(request)
-    
+        return await self.stub.BatchGetPosts(request, timeout=self.timeout)
+
+    async def search_posts(self, query: str, user_id: str, page_size: int = 10, page_token: str = ""):
+        request = post_service_pb2.SearchPostsRequest(
+            query=query,
+            user_id=user_id,
+            page_size=page_size,
+            page_token=page_token
+        )
+        return await self.stub.SearchPosts(request, timeout=self.timeout)
+
+    async def like_post(self, post_id: str, user_id: str):
+        request = post_service_pb2.LikePostRequest(post_id=post_id, user_id=user_id)
+        return await self.stub.LikePost(request, timeout=self.timeout)
+
+    async def unlike_post(self, post_id: str, user_id: str):
+        request = post_service_pb2.LikePostRequest(post_id=post_id, user_id=user_id)
+        return await self.stub.UnlikePost(request, timeout=self.timeout)
+
+    async def get_like_counts(self, post_ids: List[str], user_id: str):
+        request = post_service_pb2.GetLikeCountsRequest(post_ids=post_ids, user_id=user_id)
+        return await self.stub.GetLikeCounts(request, timeout=self.timeout)
+
+    async def create_comment(self, post_id: str, user_id: str, content: str, parent_id: str = ""):
+        request = post_service_pb2.CreateCommentRequest(
+            post_id=post_id,
+            parent_id=parent_id,
+            user_id=user_id,
+            content=content
+        )
+        return await self.stub.CreateComment(request, timeout=self.timeout)
+
+    async def list_comments(
+        self,
+        post_id: str,
+        user_id: str,
+        parent_id: str = "",
+        page_size: int = 0,
+        page_token: str = "",
+        max_depth: int = 0
+    ):
+        request = post_service_pb2.ListCommentsRequest(
+            post_id=post_id,
+            parent_id=parent_id,
+            user_id=user_id,
+            page_size=page_size,
+            page_token=page_token,
+            max_depth=max_depth
+        )
+        return await self.stub.ListComments(request, timeout=self.timeout)
+
     @staticmethod
     def _grpc_post_to_dict(grpc_post):
         return {
@@ -73,5 +192,5 @@ class PostServiceClient:
             "tags": list(grpc_post.tags)
         }
 
-def get_post_service():
-    return PostServiceClient()
\ No newline at end of file
+def get_post_service(request: Request) -> PostServiceClient:
+    return request.app.state.post_service
\ No newline at end of file
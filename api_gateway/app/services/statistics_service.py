@@ -0,0 +1,18 @@
+import os
+import httpx
+from fastapi import Request
+
+STATISTICS_SERVICE_URL = os.getenv("STATISTICS_SERVICE_URL", "http://statistics_service:8000")
+STATISTICS_SERVICE_TIMEOUT = float(os.getenv("STATISTICS_SERVICE_TIMEOUT", "5.0"))
+
+# Shared by the trending endpoint and the view event sink
+def create_statistics_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(base_url=STATISTICS_SERVICE_URL, timeout=STATISTICS_SERVICE_TIMEOUT)
+
+async def get_trending(client: httpx.AsyncClient, metric: str, limit: int) -> dict:
+    response = await client.get("/stats/trending", params={"metric": metric, "limit": limit})
+    response.raise_for_status()
+    return response.json()
+
+def get_statistics_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.statistics_client
\ No newline at end of file
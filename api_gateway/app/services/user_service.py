@@ -0,0 +1,303 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set, Tuple
+from uuid import UUID
+
+import httpx
+from fastapi import Request
+from jose import JWTError, jwt
+
+USER_SERVICE_URL = os.getenv("USER_SERVICE_URL", "http://user_service:8000")
+USER_SERVICE_TIMEOUT = float(os.getenv("USER_SERVICE_TIMEOUT", "5.0"))
+USER_SERVICE_MAX_CONNECTIONS = int(os.getenv("USER_SERVICE_MAX_CONNECTIONS", "100"))
+USER_SERVICE_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("USER_SERVICE_MAX_KEEPALIVE_CONNECTIONS", "20"))
+USER_SERVICE_HTTP2 = os.getenv("USER_SERVICE_HTTP2", "false").lower() in ("1", "true", "yes")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "60"))
+JWKS_REFRESH_INTERVAL = float(os.getenv("JWKS_REFRESH_INTERVAL", "300"))
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "30"))
+REVOCATION_POLL_INTERVAL = float(os.getenv("REVOCATION_POLL_INTERVAL", "5"))
+USER_BATCH_WINDOW = float(os.getenv("USER_BATCH_WINDOW", "0.005"))
+USER_BATCH_MAX_SIZE = int(os.getenv("USER_BATCH_MAX_SIZE", "100"))
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
+
+logger = logging.getLogger(__name__)
+
+class InvalidToken(Exception):
+    pass
+
+class UserServiceUnavailable(Exception):
+    pass
+
+# One keep-alive connection pool to user_service for the whole app
+def create_user_service_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=USER_SERVICE_URL,
+        http2=USER_SERVICE_HTTP2,
+        timeout=USER_SERVICE_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=USER_SERVICE_MAX_CONNECTIONS,
+            max_keepalive_connections=USER_SERVICE_MAX_KEEPALIVE_CONNECTIONS
+        )
+    )
+
+# Bounded LRU of already validated tokens; an entry never outlives the token's exp
+class TokenCache:
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str, Optional[str]]]" = OrderedDict()
+
+    # Returns (user_id, session_id)
+    def get(self, token: str) -> Optional[Tuple[str, Optional[str]]]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        expires_at, user_id, session_id = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return user_id, session_id
+
+    def put(self, token: str, user_id: str, exp: Optional[float] = None, session_id: Optional[str] = None):
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        self._entries[token] = (expires_at, user_id, session_id)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+# Verifies user_service tokens in-process with the keys published at /auth/jwks.
+# When user_service signs with a shared secret (empty JWKS) it falls back to /auth/auth.
+class TokenVerifier:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        cache: Optional[TokenCache] = None,
+        revocations: Optional["RevokedSessions"] = None,
+        refresh_interval: float = JWKS_REFRESH_INTERVAL,
+        min_refresh_interval: float = JWKS_MIN_REFRESH_INTERVAL
+    ):
+        self.cache = cache or TokenCache()
+        self.revocations = revocations or RevokedSessions(client)
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._client = client
+        self._keys: Dict[Optional[str], dict] = {}
+        self._keys_fetched_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def verify(self, token: str) -> str:
+        cached = self.cache.get(token)
+        if cached is None:
+            user_id, session_id = await self._verify(token)
+        else:
+            user_id, session_id = cached
+        # Cached and locally verified tokens both have to follow logouts
+        if session_id is not None and self.revocations.contains(session_id):
+            raise InvalidToken("Session revoked")
+        return user_id
+
+    async def _verify(self, token: str) -> Tuple[str, Optional[str]]:
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError:
+            raise InvalidToken("Malformed token")
+
+        key = await self._get_key(header.get("kid"))
+        if key is None:
+            user_id = await self._verify_remote(token)
+            payload = jwt.get_unverified_claims(token)
+        else:
+            try:
+                payload = jwt.decode(token, key, algorithms=[key.get("alg")])
+            except JWTError:
+                raise InvalidToken("Invalid or expired token")
+            user_id = payload.get("usr")
+            if user_id is None:
+                raise InvalidToken("Invalid token")
+
+        session_id = payload.get("sid")
+        self.cache.put(token, user_id, payload.get("exp"), session_id)
+        return user_id, session_id
+
+    async def _get_key(self, kid: Optional[str]) -> Optional[dict]:
+        if self._age() is None or self._age() >= self.refresh_interval:
+            await self._refresh_keys()
+        if not self._keys:
+            return None
+        if kid not in self._keys and self._age() >= self.min_refresh_interval:
+            # Possibly a rotated key: re-fetch, but not more often than min_refresh_interval
+            await self._refresh_keys()
+        if kid not in self._keys:
+            raise InvalidToken("Unknown signing key")
+        return self._keys[kid]
+
+    def _age(self) -> Optional[float]:
+        if self._keys_fetched_at is None:
+            return None
+        return time.monotonic() - self._keys_fetched_at
+
+    async def _refresh_keys(self):
+        async with self._lock:
+            age = self._age()
+            if age is not None and age < self.min_refresh_interval:
+                # Another request refreshed the keys while we were waiting
+                return
+            try:
+                response = await self._client.get("/auth/jwks")
+                response.raise_for_status()
+            except httpx.HTTPError:
+                if age is None:
+                    raise
+                # Keep the keys we have while user_service is unreachable, retry later
+                self._keys_fetched_at = time.monotonic() - self.refresh_interval + self.min_refresh_interval
+                return
+            self._keys = {key.get("kid"): key for key in response.json().get("keys", [])}
+            self._keys_fetched_at = time.monotonic()
+
+    async def _verify_remote(self, token: str) -> str:
+        response = await self._client.get("/auth/auth", headers={"Cookie": f"users_access_token={token}"})
+        if response.status_code == 401:
+            raise InvalidToken("Invalid authentication credentials")
+        response.raise_for_status()
+        return response.json()
+
+# Revoked session ids, followed incrementally from user_service's /auth/revocations by a
+# background task; requests only look them up in memory
+class RevokedSessions:
+    def __init__(self, client: httpx.AsyncClient, poll_interval: float = REVOCATION_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._client = client
+        self._revoked: Dict[str, float] = {}
+        self._until: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def contains(self, session_id: str) -> bool:
+        return session_id in self._revoked
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await self.poll()
+            await asyncio.sleep(self.poll_interval)
+
+    async def poll(self):
+        try:
+            response = await self._client.get(
+                "/auth/revocations",
+                params={"since": self._until} if self._until else None,
+                headers={"X-Internal-Token": INTERNAL_API_TOKEN}
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning("Revocation poll failed: %s", e)
+            return
+        data = response.json()
+        for session in data["sessions"]:
+            expires_at = datetime.fromisoformat(session["expires_at"]).replace(tzinfo=timezone.utc)
+            self._revoked[session["id"]] = expires_at.timestamp()
+        self._until = data["until"] or self._until
+        now = time.time()
+        self._revoked = {session_id: exp for session_id, exp in self._revoked.items() if exp > now}
+
+def _is_uuid(value: str) -> bool:
+    try:
+        return str(UUID(value)) == value
+    except ValueError:
+        return False
+
+# DataLoader-style coalescing of user lookups: ids requested by concurrent requests within
+# `window` seconds go to user_service as one POST /users/batch (split at max_batch_size)
+class UserLoader:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        window: float = USER_BATCH_WINDOW,
+        max_batch_size: int = USER_BATCH_MAX_SIZE
+    ):
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self._client = client
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load_many(self, user_ids: Iterable[str]) -> Dict[str, Optional[dict]]:
+        # Ids that are not UUIDs can't be users; they would fail the whole batch
+        unique_ids = [user_id for user_id in dict.fromkeys(user_ids) if _is_uuid(user_id)]
+        # Futures are shared with concurrent requests for the same ids; a cancelled caller
+        # (e.g. a client disconnect) must not cancel them for everyone else
+        users = await asyncio.gather(*(asyncio.shield(self._enqueue(user_id)) for user_id in unique_ids))
+        return dict(zip(unique_ids, users))
+
+    def _enqueue(self, user_id: str) -> asyncio.Future:
+        future = self._pending.get(user_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[user_id] = loop.create_future()
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._dispatch)
+        return future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            self.batches += 1
+            task = asyncio.ensure_future(self._fetch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    # Sends what is still pending and waits for the batches in flight
+    async def close(self):
+        self._dispatch()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _fetch(self, batch: Dict[str, asyncio.Future]):
+        try:
+            response = await self._client.post(
+                "/users/batch",
+                json={"ids": list(batch)},
+                headers={"X-Internal-Token": INTERNAL_API_TOKEN}
+            )
+            response.raise_for_status()
+            users = {user["id"]: user for user in response.json()["users"]}
+        except Exception as e:
+            # Whatever went wrong, callers only need to know the users are unavailable
+            logger.warning("User batch failed: %r", e)
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(UserServiceUnavailable(str(e)))
+            return
+        for user_id, future in batch.items():
+            if not future.done():
+                future.set_result(users.get(user_id))
+
+def get_user_loader(request: Request) -> UserLoader:
+    return request.app.state.user_loader
\ No newline at end of file
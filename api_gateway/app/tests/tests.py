@@ -0,0 +1,135 @@
+import asyncio
+import unittest
+from uuid import uuid4
+import httpx
+from app.etag import etag_matches, if_match_version
+from app.services.events import EventBuffer, EventSink
+from app.services.user_service import UserLoader, UserServiceUnavailable
+
+def event(n):
+    return {"type": "view", "post_id": str(n), "user_id": "u1"}
+
+# Records what it gets; send blocks until release is set and raises if fail is set
+class FakeSink(EventSink):
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+        self.closed = False
+        self.received = asyncio.Event()
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def send(self, events):
+        self.received.set()
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("sink down")
+        self.batches.append(events)
+
+    async def close(self):
+        self.closed = True
+
+class TestEventBuffer(unittest.IsolatedAsyncioTestCase):
+    async def test_drops_when_full(self):
+        buffer = EventBuffer(FakeSink(), max_size=3, batch_size=10, flush_interval=60)
+        results = [buffer.emit(event(n)) for n in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertEqual(buffer.stats(), {"emitted": 3, "dropped": 2, "failed": 0, "sent": 0, "buffered": 3})
+
+    async def test_slow_sink_fills_buffer(self):
+        sink = FakeSink()
+        sink.release.clear()
+        buffer = EventBuffer(sink, max_size=4, batch_size=2, flush_interval=60)
+        buffer.start()
+        buffer.emit(event(0))
+        buffer.emit(event(1))
+        await asyncio.wait_for(sink.received.wait(), 1)
+        # The first batch is stuck in the sink, so only max_size more fit
+        results = [buffer.emit(event(n)) for n in range(2, 7)]
+        self.assertEqual(results, [True, True, True, True, False])
+        self.assertEqual(buffer.stats()["dropped"], 1)
+        sink.release.set()
+        await buffer.close()
+        self.assertEqual([len(batch) for batch in sink.batches], [2, 2, 2])
+        self.assertEqual(buffer.stats(), {"emitted": 6, "dropped": 1, "failed": 0, "sent": 6, "buffered": 0})
+
+    async def test_failed_batches_are_counted(self):
+        buffer = EventBuffer(FakeSink(fail=True), max_size=10, batch_size=2, flush_interval=60)
+        for n in range(3):
+            buffer.emit(event(n))
+        with self.assertLogs("app.services.events", "WARNING"):
+            await buffer.flush()
+        self.assertEqual(buffer.stats(), {"emitted": 3, "dropped": 0, "failed": 3, "sent": 0, "buffered": 0})
+
+    async def test_full_batch_is_sent_before_interval(self):
+        sink = FakeSink()
+        buffer = EventBuffer(sink, max_size=10, batch_size=2, flush_interval=60)
+        buffer.start()
+        for n in range(3):
+            buffer.emit(event(n))
+        await asyncio.wait_for(sink.received.wait(), 1)
+        await asyncio.sleep(0)
+        self.assertEqual(sink.batches, [[event(0), event(1)]])
+        self.assertEqual(buffer.stats()["buffered"], 1)
+        await buffer.close()
+
+    async def test_partial_batch_is_sent_after_interval(self):
+        sink = FakeSink()
+        buffer = EventBuffer(sink, max_size=10, batch_size=100, flush_interval=0.01)
+        buffer.start()
+        buffer.emit(event(0))
+        await asyncio.wait_for(sink.received.wait(), 1)
+        await asyncio.sleep(0)
+        self.assertEqual(sink.batches, [[event(0)]])
+        await buffer.close()
+
+    async def test_close_drains_buffer(self):
+        sink = FakeSink()
+        buffer = EventBuffer(sink, max_size=10, batch_size=2, flush_interval=60)
+        buffer.start()
+        sink.release.clear()
+        for n in range(5):
+            buffer.emit(event(n))
+        await asyncio.wait_for(sink.received.wait(), 1)
+        closing = asyncio.create_task(buffer.close())
+        await asyncio.sleep(0)
+        sink.release.set()
+        await closing
+        self.assertEqual([len(batch) for batch in sink.batches], [2, 2, 1])
+        self.assertEqual(buffer.stats()["sent"], 5)
+        self.assertTrue(sink.closed)
+
+class TestUserLoader(unittest.IsolatedAsyncioTestCase):
+    def loader(self, handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://users")
+        self.addAsyncCleanup(client.aclose)
+        return UserLoader(client, window=0.01)
+
+    async def test_cancelled_caller_does_not_fail_others(self):
+        user_id = str(uuid4())
+        loader = self.loader(lambda request: httpx.Response(200, json={"users": [{"id": user_id}]}))
+        first = asyncio.create_task(loader.load_many([user_id]))
+        second = asyncio.create_task(loader.load_many([user_id]))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, {user_id: {"id": user_id}})
+        self.assertEqual(loader.batches, 1)
+        await loader.close()
+
+    async def test_bad_response_is_unavailable(self):
+        loader = self.loader(lambda request: httpx.Response(200, json={"unexpected": []}))
+        with self.assertLogs("app.services.user_service", "WARNING"):
+            with self.assertRaises(UserServiceUnavailable):
+                await loader.load_many([str(uuid4())])
+        await loader.close()
+
+class TestEtag(unittest.TestCase):
+    def test_if_none_match_is_weak(self):
+        self.assertTrue(etag_matches('W/"p1.5", "p2.1"', '"p1.5"'))
+        self.assertFalse(etag_matches('"p1.4"', '"p1.5"'))
+
+    def test_if_match_is_strong(self):
+        self.assertEqual(if_match_version('"p2.1", "p1.5"', "p1"), 5)
+        self.assertIsNone(if_match_version("*", "p1"))
+        with self.assertRaises(ValueError):
+            if_match_version('W/"p1.5"', "p1")
\ No newline at end of file
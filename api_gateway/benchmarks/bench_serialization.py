@@ -0,0 +1,58 @@
+# Micro-benchmark: protobuf -> HTTP JSON body for a post list.
+# Run from api_gateway with the generated protos on the path:
+#   PYTHONPATH=. python benchmarks/bench_serialization.py [posts] [iterations]
+import sys
+import timeit
+from datetime import datetime, timezone
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import post_service_pb2
+from app.schemas import PostListResponse, PostResponse
+from app.serialization import post_list_response
+from app.services.post_service import PostServiceClient
+
+def make_posts(count: int):
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        post_service_pb2.Post(
+            id=f"00000000-0000-0000-0000-{i:012d}",
+            title=f"Post number {i}",
+            description="Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+            creator_id=f"user-{i % 17}",
+            created_at=now,
+            updated_at=now,
+            is_private=bool(i % 2),
+            tags=["python", "grpc", f"tag-{i % 5}"]
+        )
+        for i in range(count)
+    ]
+
+# What the routers did before: dict -> pydantic models -> validation against
+# response_model -> jsonable_encoder -> json.dumps
+def pydantic_path(posts):
+    model = PostListResponse(
+        posts=[PostResponse(**PostServiceClient._grpc_post_to_dict(post)) for post in posts],
+        total=len(posts),
+        page=1,
+        page_size=len(posts)
+    )
+    validated = PostListResponse.model_validate(model.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+def fast_path(posts):
+    return post_list_response(posts, page=1, page_size=len(posts), total=len(posts)).body
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    posts = make_posts(count)
+
+    results = {}
+    for name, func in (("pydantic", pydantic_path), ("orjson", fast_path)):
+        seconds = min(timeit.repeat(lambda: func(posts), number=iterations, repeat=3))
+        results[name] = seconds / iterations * 1e6
+        print(f"{name:>8}: {results[name]:8.1f} us per {count}-post response")
+    print(f"speedup: {results['pydantic'] / results['orjson']:.1f}x")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
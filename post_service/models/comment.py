@@ -0,0 +1,28 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.sql import func
+from uuid import uuid4
+from .database import Base
+
+# Materialized path: one fixed-width segment per ancestor plus the comment itself,
+# "<created_at micros, 14 hex><first 8 hex of id>" joined with ".". With the "C"
+# collation a subtree is the range (path + ".", path + "/") and sorting by path gives
+# depth-first thread order with siblings by time.
+PATH_SEPARATOR = "."
+PATH_UPPER_BOUND = chr(ord(PATH_SEPARATOR) + 1)
+
+class Comment(Base):
+    __tablename__ = "comments"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid4()))
+    post_id = Column(String, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    parent_comment_id = Column(String, ForeignKey("comments.id", ondelete="CASCADE"))
+    user_id = Column(String, nullable=False)
+    content = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    path = Column(String(collation="C"), nullable=False)
+    depth = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_comments_post_id_path", post_id, path, unique=True),
+    )
\ No newline at end of file
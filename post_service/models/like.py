@@ -0,0 +1,24 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, String, UniqueConstraint
+from sqlalchemy.sql import func
+from uuid import uuid4
+from .database import Base
+
+class PostLike(Base):
+    __tablename__ = "post_likes"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid4()))
+    post_id = Column(String, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(String, nullable=False)
+    liked_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # One like per user and post; also serves "did this user like these posts"
+        UniqueConstraint("post_id", "user_id", name="uq_post_likes_post_id_user_id"),
+    )
+
+# Denormalized like counter; written only by the batched flush of LikeCounter
+class PostLikeCount(Base):
+    __tablename__ = "post_like_counts"
+
+    post_id = Column(String, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    likes = Column(BigInteger, nullable=False, default=0)
\ No newline at end of file
@@ -0,0 +1,16 @@
+from sqlalchemy import text
+from .post import SEARCH_VECTOR_EXPRESSION
+
+# create_all only creates missing tables, so objects added to existing tables
+# are applied here as well. Every statement must be idempotent.
+MIGRATIONS = [
+    "CREATE INDEX IF NOT EXISTS ix_posts_created_at_id ON posts (created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_posts_tags ON posts USING gin (tags)",
+    f"ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING gin (search_vector)",
+]
+
+def run_migrations(engine):
+    with engine.begin() as connection:
+        for statement in MIGRATIONS:
+            connection.execute(text(statement))
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import BigInteger, Column, DateTime, Identity, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from .database import Base
+
+# Post changes waiting to be published, written in the transaction of the change itself.
+# Rows are deleted once the broker has accepted them.
+class OutboxEvent(Base):
+    __tablename__ = "post_outbox"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    event_type = Column(String, nullable=False)
+    post_id = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Claimed rows are leased to a relay until then; expired leases are picked up again
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_post_outbox_available_at_id", available_at, id),
+    )
\ No newline at end of file
@@ -1,8 +1,17 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ARRAY
+from sqlalchemy import Column, String, Boolean, DateTime, Index, Computed
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from uuid import uuid4
 from .database import Base
 
+SEARCH_CONFIG = "simple"
+# Title matches rank above description matches
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')"
+)
+
 class Post(Base):
     __tablename__ = "posts"
 
@@ -14,6 +23,16 @@ class Post(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     is_private = Column(Boolean, default=False)
     tags = Column(ARRAY(String), default=[])
+    # Maintained by Postgres on every write; only SearchPosts reads it
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
+
+    __table_args__ = (
+        # Keyset pagination order for ListPosts
+        Index("ix_posts_created_at_id", created_at.desc(), id.desc()),
+        # tags_any / tags_all filters (&& and @>)
+        Index("ix_posts_tags", tags, postgresql_using="gin"),
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     def to_dict(self):
         return {
@@ -1,41 +1,123 @@
-from concurrent import futures
+import asyncio
+import logging
+import os
 import grpc
 import post_service_pb2
 import post_service_pb2_grpc
-from services.post_service import PostService
-from models.database import get_db, Base, engine
+from services.post_service import InvalidArgument, PostService, PreconditionFailed
+from services.cache import create_post_cache, create_total_cache
+from services.counters import CounterBuffer, LIKE_FLUSH_INTERVAL
+from services.like_service import LikeService, flush_like_counts
+from services.comment_service import CommentService
+from services.outbox import OUTBOX_POLL_INTERVAL, OutboxRelay, create_broker
+from models.database import AsyncSessionLocal, Base, engine, async_engine
+from models.migrations import run_migrations
 
-def serve():
+GRPC_PORT = int(os.getenv("GRPC_PORT", "50051"))
+GRPC_MAX_CONCURRENT_RPCS = int(os.getenv("GRPC_MAX_CONCURRENT_RPCS", "100"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
+logger = logging.getLogger(__name__)
+
+# Accept keepalive pings from the gateway's long-lived channels
+GRPC_SERVER_OPTIONS = [
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.min_ping_interval_without_data_ms", 10000),
+]
+
+async def serve():
     # Create database tables
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
     
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    post_service_pb2_grpc.add_PostServiceServicer_to_server(
-        PostServiceServicer(), server
+    server = grpc.aio.server(
+        options=GRPC_SERVER_OPTIONS,
+        maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS
     )
-    server.add_insecure_port("[::]:50051")
-    server.start()
-    print("Server started on port 50051")
-    server.wait_for_termination()
+    servicer = PostServiceServicer()
+    post_service_pb2_grpc.add_PostServiceServicer_to_server(servicer, server)
+    server.add_insecure_port(f"[::]:{GRPC_PORT}")
+    await server.start()
+    logger.info("Server started on port %d", GRPC_PORT)
+    stop_flushing = asyncio.Event()
+    like_flusher = asyncio.create_task(flush_likes_periodically(servicer, stop_flushing))
+    # Publishing runs beside the RPCs; writes only insert into the outbox
+    relay = OutboxRelay(create_broker())
+    outbox_relay = asyncio.create_task(relay_outbox(relay))
+    try:
+        await server.wait_for_termination()
+    finally:
+        logger.info("Post cache stats: %s", servicer.post_cache.stats())
+        logger.info("Outbox events published: %d", relay.published)
+        # Lets a flush in progress finish before the last one
+        stop_flushing.set()
+        await like_flusher
+        outbox_relay.cancel()
+        await servicer.flush_likes()
+        await relay.broker.close()
+        await async_engine.dispose()
+
+async def flush_likes_periodically(servicer, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), LIKE_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            await servicer.flush_likes()
+
+async def run_with_session(method):
+    async with AsyncSessionLocal() as session:
+        return await session.run_sync(method)
+
+async def relay_outbox(relay):
+    while True:
+        try:
+            # Full batches mean a backlog: keep going without waiting
+            if await relay.relay_once(run_with_session) == relay.batch_size:
+                continue
+        except Exception as e:
+            logger.warning("Outbox relay failed, claimed events are retried after the lease: %s", e)
+        await asyncio.sleep(OUTBOX_POLL_INTERVAL)
 
 class PostServiceServicer(post_service_pb2_grpc.PostServiceServicer):
     def __init__(self):
-        self.db = next(get_db())
+        self.post_cache = create_post_cache()
+        self.total_cache = create_total_cache()
+        self.like_counts = CounterBuffer()
+
+    async def _run(self, method):
+        # Every RPC gets its own pooled session; PostService runs on it via run_sync
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(lambda db: method(
+                PostService(db, cache=self.post_cache, total_cache=self.total_cache)
+            ))
+
+    async def _run_likes(self, method):
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(lambda db: method(LikeService(db, self.like_counts)))
 
-    def CreatePost(self, request, context):
+    async def _run_comments(self, method):
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(lambda db: method(CommentService(db)))
+
+    async def flush_likes(self):
         try:
-            post_service = PostService(self.db)
-            post = post_service.create_post(request)
+            async with AsyncSessionLocal() as session:
+                await session.run_sync(lambda db: flush_like_counts(db, self.like_counts))
+        except Exception as e:
+            logger.warning("Like counts flush failed, retrying with the next one: %s", e)
+
+    async def CreatePost(self, request, context):
+        try:
+            post = await self._run(lambda service: service.create_post(request))
             return post_service_pb2.PostResponse(post=post)
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
             return post_service_pb2.PostResponse()
 
-    def GetPost(self, request, context):
+    async def GetPost(self, request, context):
         try:
-            post_service = PostService(self.db)
-            post = post_service.get_post(request)
+            post = await self._run(lambda service: service.get_post(request))
             return post_service_pb2.PostResponse(post=post)
         except ValueError as e:
             context.set_code(grpc.StatusCode.NOT_FOUND)
@@ -50,11 +132,14 @@ class PostServiceServicer(post_service_pb2_grpc.PostServiceServicer):
             context.set_details(str(e))
             return post_service_pb2.PostResponse()
 
-    def UpdatePost(self, request, context):
+    async def UpdatePost(self, request, context):
         try:
-            post_service = PostService(self.db)
-            post = post_service.update_post(request)
+            post = await self._run(lambda service: service.update_post(request))
             return post_service_pb2.PostResponse(post=post)
+        except InvalidArgument as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return post_service_pb2.PostResponse()
         except ValueError as e:
             context.set_code(grpc.StatusCode.NOT_FOUND)
             context.set_details(str(e))
@@ -63,15 +148,18 @@ class PostServiceServicer(post_service_pb2_grpc.PostServiceServicer):
             context.set_code(grpc.StatusCode.PERMISSION_DENIED)
             context.set_details(str(e))
             return post_service_pb2.PostResponse()
+        except PreconditionFailed as e:
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            context.set_details(str(e))
+            return post_service_pb2.PostResponse()
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
             return post_service_pb2.PostResponse()
 
-    def DeletePost(self, request, context):
+    async def DeletePost(self, request, context):
         try:
-            post_service = PostService(self.db)
-            success = post_service.delete_post(request)
+            success = await self._run(lambda service: service.delete_post(request))
             return post_service_pb2.DeletePostResponse(success=success)
         except ValueError as e:
             context.set_code(grpc.StatusCode.NOT_FOUND)
@@ -86,14 +174,148 @@ class PostServiceServicer(post_service_pb2_grpc.PostServiceServicer):
             context.set_details(str(e))
             return post_service_pb2.DeletePostResponse(success=False)
 
-    def ListPosts(self, request, context):
+    async def ListPosts(self, request, context):
         try:
-            post_service = PostService(self.db)
-            return post_service.list_posts(request)
+            return await self._run(lambda service: service.list_posts(request))
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return post_service_pb2.ListPostsResponse()
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
             return post_service_pb2.ListPostsResponse()
 
+    async def BatchGetPosts(self, request, context):
+        try:
+            posts = await self._run(lambda service: service.batch_get_posts(request))
+            return post_service_pb2.BatchGetPostsResponse(posts=posts)
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return post_service_pb2.BatchGetPostsResponse()
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return post_service_pb2.BatchGetPostsResponse()
+
+    async def ImportPosts(self, request_iterator, context):
+        response = post_service_pb2.ImportPostsResponse()
+        try:
+            batch = []
+            async for request in request_iterator:
+                batch.extend(request.posts)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    await self._import_batch(batch, response)
+                    batch = []
+            if batch:
+                await self._import_batch(batch, response)
+            return response
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return response
+
+    async def _import_batch(self, batch, response):
+        result = await self._run(lambda service: service.import_posts(batch))
+        result.batch = len(response.batches) + 1
+        response.batches.append(result)
+        response.imported += result.imported
+        response.failed += result.failed
+        logger.info(
+            "ImportPosts: batch %d: %d imported, %d failed, %d total",
+            result.batch, result.imported, result.failed, response.imported
+        )
+
+    async def SearchPosts(self, request, context):
+        try:
+            return await self._run(lambda service: service.search_posts(request))
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return post_service_pb2.SearchPostsResponse()
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return post_service_pb2.SearchPostsResponse()
+
+    async def ExportPosts(self, request, context):
+        try:
+            async with AsyncSessionLocal() as session:
+                # Only builds the statement and protos; rows are streamed with the async session
+                service = PostService(session.sync_session)
+                result = await session.stream_scalars(service.export_statement(request))
+                async for posts in result.partitions():
+                    yield service.export_chunk(posts)
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+
+    async def LikePost(self, request, context):
+        return await self._like(lambda service: service.like_post(request), context)
+
+    async def UnlikePost(self, request, context):
+        return await self._like(lambda service: service.unlike_post(request), context)
+
+    async def _like(self, method, context):
+        try:
+            return await self._run_likes(method)
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(str(e))
+            return post_service_pb2.LikePostResponse()
+        except PermissionError as e:
+            context.set_code(grpc.StatusCode.PERMISSION_DENIED)
+            context.set_details(str(e))
+            return post_service_pb2.LikePostResponse()
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return post_service_pb2.LikePostResponse()
+
+    async def GetLikeCounts(self, request, context):
+        try:
+            return await self._run_likes(lambda service: service.get_like_counts(request))
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return post_service_pb2.GetLikeCountsResponse()
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return post_service_pb2.GetLikeCountsResponse()
+
+    async def CreateComment(self, request, context):
+        return await self._comments(lambda service: service.create_comment(request), context, post_service_pb2.Comment)
+
+    async def ListComments(self, request, context):
+        return await self._comments(
+            lambda service: service.list_comments(request), context, post_service_pb2.ListCommentsResponse
+        )
+
+    async def _comments(self, method, context, response_type):
+        try:
+            return await self._run_comments(method)
+        except InvalidArgument as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return response_type()
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(str(e))
+            return response_type()
+        except PermissionError as e:
+            context.set_code(grpc.StatusCode.PERMISSION_DENIED)
+            context.set_details(str(e))
+            return response_type()
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return response_type()
+
 if __name__ == "__main__":
-    serve()
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve())
\ No newline at end of file
@@ -0,0 +1,135 @@
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from sqlalchemy.util import await_only
+
+POST_CACHE_SIZE = int(os.getenv("POST_CACHE_SIZE", "10000"))
+POST_CACHE_TTL = float(os.getenv("POST_CACHE_TTL", "30"))
+POST_CACHE_REDIS_URL = os.getenv("POST_CACHE_REDIS_URL", "")
+POST_CACHE_INVALIDATION_TTL = float(os.getenv("POST_CACHE_INVALIDATION_TTL", "5"))
+TOTAL_CACHE_SIZE = int(os.getenv("TOTAL_CACHE_SIZE", "10000"))
+TOTAL_CACHE_TTL = float(os.getenv("TOTAL_CACHE_TTL", "10"))
+
+# invalidate() leaves a tombstone for invalidation_ttl instead of deleting the key: reads
+# miss, and add() (used to fill the cache after a database read) can't put back a value
+# that was read before the invalidation. It only has to outlive the reads in flight.
+_TOMBSTONE = object()
+
+# Bounded LRU with a TTL per entry, shared by all requests of the process
+class LocalCache:
+    def __init__(
+        self,
+        max_size: int = POST_CACHE_SIZE,
+        ttl: float = POST_CACHE_TTL,
+        invalidation_ttl: float = POST_CACHE_INVALIDATION_TTL
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.invalidation_ttl = invalidation_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None or entry[1] is _TOMBSTONE:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._put(key, value, self.ttl)
+
+    # Only fills an absent key; False when it is cached or invalidated
+    def add(self, key: str, value: Any) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return False
+            self._put(key, value, self.ttl)
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._put(key, _TOMBSTONE, self.invalidation_ttl)
+
+    def _put(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._entries)}
+
+# Redis-compatible backend. Works with redis-py style clients, sync or asyncio;
+# async calls are awaited from inside run_sync, where PostService runs under the aio server.
+# Tombstones are empty values, add() is SET NX.
+class RedisCache:
+    def __init__(
+        self,
+        client,
+        ttl: float = POST_CACHE_TTL,
+        prefix: str = "post:",
+        invalidation_ttl: float = POST_CACHE_INVALIDATION_TTL
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.invalidation_ttl = invalidation_ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._resolve(self.client.get(self.prefix + key))
+        if not value:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes):
+        self._resolve(self.client.set(self.prefix + key, value, px=int(self.ttl * 1000)))
+
+    def add(self, key: str, value: bytes) -> bool:
+        return bool(self._resolve(self.client.set(self.prefix + key, value, px=int(self.ttl * 1000), nx=True)))
+
+    def delete(self, key: str):
+        self._resolve(self.client.delete(self.prefix + key))
+
+    def invalidate(self, key: str):
+        self._resolve(self.client.set(self.prefix + key, b"", px=int(self.invalidation_ttl * 1000)))
+
+    def stats(self) -> dict:
+        # Evictions happen inside Redis and are reported by its INFO stats
+        return {"hits": self.hits, "misses": self.misses, "evictions": 0}
+
+    @staticmethod
+    def _resolve(result):
+        return await_only(result) if inspect.isawaitable(result) else result
+
+def create_post_cache():
+    if POST_CACHE_REDIS_URL:
+        import redis.asyncio as redis
+        return RedisCache(redis.Redis.from_url(POST_CACHE_REDIS_URL))
+    return LocalCache()
+
+def create_total_cache():
+    return LocalCache(TOTAL_CACHE_SIZE, TOTAL_CACHE_TTL)
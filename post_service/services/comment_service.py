@@ -0,0 +1,111 @@
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import uuid4
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.comment import Comment, PATH_SEPARATOR, PATH_UPPER_BOUND
+from services.outbox import COMMENT_CREATED, record_event
+from services.pagination import encode_comment_token, decode_comment_token, timestamp_micros
+from services.post_service import InvalidArgument, PostService
+import post_service_pb2
+
+DEFAULT_COMMENTS_PAGE_SIZE = 20
+MAX_COMMENTS_PAGE_SIZE = 100
+# Each level adds a 23 character path segment; this keeps paths well below the btree entry limit
+MAX_COMMENT_DEPTH = 64
+
+def _path_segment(created_at: datetime, comment_id: str) -> str:
+    return f"{timestamp_micros(created_at):014x}{comment_id.replace('-', '')[:8]}"
+
+class CommentService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_comment(self, request: post_service_pb2.CreateCommentRequest) -> post_service_pb2.Comment:
+        if not request.content.strip():
+            raise InvalidArgument("Comment content is required")
+        PostService.check_visible(self.db, request.post_id, request.user_id)
+
+        comment = Comment(
+            id=str(uuid4()),
+            post_id=request.post_id,
+            user_id=request.user_id,
+            content=request.content,
+            created_at=datetime.now(timezone.utc)
+        )
+        segment = _path_segment(comment.created_at, comment.id)
+        if request.parent_id:
+            parent = self._get_comment(request.post_id, request.parent_id)
+            if parent.depth + 1 >= MAX_COMMENT_DEPTH:
+                raise InvalidArgument(f"Comments can't be nested deeper than {MAX_COMMENT_DEPTH} levels")
+            comment.parent_comment_id = parent.id
+            comment.path = parent.path + PATH_SEPARATOR + segment
+            comment.depth = parent.depth + 1
+        else:
+            comment.path = segment
+            comment.depth = 0
+        self.db.add(comment)
+        record_event(self.db, COMMENT_CREATED, comment.post_id, {
+            "id": comment.id,
+            "parent_id": comment.parent_comment_id,
+            "user_id": comment.user_id,
+            "depth": comment.depth
+        })
+        self.db.commit()
+        return self._comment_to_proto(comment)
+
+    def list_comments(self, request: post_service_pb2.ListCommentsRequest) -> post_service_pb2.ListCommentsResponse:
+        page_size = request.page_size or DEFAULT_COMMENTS_PAGE_SIZE
+        if page_size < 0 or page_size > MAX_COMMENTS_PAGE_SIZE:
+            raise InvalidArgument(f"page_size must be between 1 and {MAX_COMMENTS_PAGE_SIZE}")
+        if request.max_depth < 0:
+            raise InvalidArgument("max_depth can't be negative")
+        after = None
+        if request.page_token:
+            try:
+                after = decode_comment_token(request.page_token)
+            except ValueError as e:
+                raise InvalidArgument(str(e))
+        PostService.check_visible(self.db, request.post_id, request.user_id)
+
+        # The subtree is one range scan of ix_comments_post_id_path; the page continues
+        # after the last path returned, so deep threads page without OFFSET
+        query = select(Comment).where(Comment.post_id == request.post_id).order_by(Comment.path)
+        parent: Optional[Comment] = None
+        if request.parent_id:
+            parent = self._get_comment(request.post_id, request.parent_id)
+            query = query.where(
+                Comment.path > parent.path + PATH_SEPARATOR,
+                Comment.path < parent.path + PATH_UPPER_BOUND
+            )
+        if request.max_depth:
+            base_depth = parent.depth + 1 if parent is not None else 0
+            query = query.where(Comment.depth < base_depth + request.max_depth)
+        if after is not None:
+            query = query.where(Comment.path > after)
+
+        comments = self.db.scalars(query.limit(page_size + 1)).all()
+        response = post_service_pb2.ListCommentsResponse()
+        for comment in comments[:page_size]:
+            response.comments.append(self._comment_to_proto(comment))
+        if len(comments) > page_size:
+            response.next_page_token = encode_comment_token(comments[page_size - 1].path)
+        return response
+
+    def _get_comment(self, post_id: str, comment_id: str) -> Comment:
+        comment = self.db.query(Comment).filter(Comment.id == comment_id, Comment.post_id == post_id).first()
+        if comment is None:
+            raise ValueError("Comment not found")
+        return comment
+
+    def _comment_to_proto(self, comment: Comment) -> post_service_pb2.Comment:
+        proto = post_service_pb2.Comment(
+            id=comment.id,
+            post_id=comment.post_id,
+            parent_id=comment.parent_comment_id or "",
+            user_id=comment.user_id,
+            content=comment.content,
+            depth=comment.depth
+        )
+        proto.created_at.FromDatetime(comment.created_at)
+        return proto
\ No newline at end of file
@@ -0,0 +1,47 @@
+import os
+import threading
+from collections import defaultdict
+from typing import Dict
+
+LIKE_FLUSH_INTERVAL = float(os.getenv("LIKE_FLUSH_INTERVAL", "1"))
+LIKE_FLUSH_BATCH_SIZE = int(os.getenv("LIKE_FLUSH_BATCH_SIZE", "1000"))
+
+# Write-behind counter deltas. Likes on a hot post add up here instead of each
+# updating (and locking) the same counter row; a background task drains them in batches.
+class CounterBuffer:
+    def __init__(self):
+        self.flushed = 0
+        self._deltas: Dict[str, int] = defaultdict(int)
+        # Drained but not committed yet; still counted by pending()
+        self._in_flight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, delta: int):
+        with self._lock:
+            self._deltas[key] += delta
+
+    def pending(self, key: str) -> int:
+        with self._lock:
+            return self._deltas.get(key, 0) + self._in_flight.get(key, 0)
+
+    # One flush at a time: drain, write, then commit() or restore()
+    def drain(self) -> Dict[str, int]:
+        with self._lock:
+            deltas, self._deltas = self._deltas, defaultdict(int)
+            self._in_flight = {key: delta for key, delta in deltas.items() if delta}
+            return dict(self._in_flight)
+
+    def commit(self):
+        with self._lock:
+            self.flushed += len(self._in_flight)
+            self._in_flight = {}
+
+    # Puts the drained deltas back after a failed flush so they go out with the next one
+    def restore(self):
+        with self._lock:
+            for key, delta in self._in_flight.items():
+                self._deltas[key] += delta
+            self._in_flight = {}
+
+    def __len__(self):
+        return len(self._deltas)
\ No newline at end of file
@@ -0,0 +1,100 @@
+from sqlalchemy import BigInteger, String, column, delete, func, select, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from models.like import PostLike, PostLikeCount
+from models.post import Post
+from services.counters import CounterBuffer, LIKE_FLUSH_BATCH_SIZE
+from services.outbox import POST_LIKED, POST_UNLIKED, record_event
+from services.post_service import MAX_BATCH_GET_POSTS, PostService
+import post_service_pb2
+
+class LikeService:
+    def __init__(self, db: Session, counter: CounterBuffer):
+        self.db = db
+        self.counter = counter
+
+    def like_post(self, request: post_service_pb2.LikePostRequest) -> post_service_pb2.LikePostResponse:
+        PostService.check_visible(self.db, request.post_id, request.user_id)
+        # The unique (post_id, user_id) constraint makes repeated likes no-ops
+        liked = self.db.scalars(
+            insert(PostLike)
+            .values(post_id=request.post_id, user_id=request.user_id)
+            .on_conflict_do_nothing(index_elements=[PostLike.post_id, PostLike.user_id])
+            .returning(PostLike.id)
+        ).first()
+        if liked is not None:
+            record_event(self.db, POST_LIKED, request.post_id, {"user_id": request.user_id})
+        self.db.commit()
+        if liked is not None:
+            self.counter.add(request.post_id, 1)
+        return post_service_pb2.LikePostResponse(changed=liked is not None, likes=self._likes(request.post_id))
+
+    def unlike_post(self, request: post_service_pb2.LikePostRequest) -> post_service_pb2.LikePostResponse:
+        PostService.check_visible(self.db, request.post_id, request.user_id)
+        unliked = self.db.scalars(
+            delete(PostLike)
+            .where(PostLike.post_id == request.post_id, PostLike.user_id == request.user_id)
+            .returning(PostLike.id)
+        ).first()
+        if unliked is not None:
+            record_event(self.db, POST_UNLIKED, request.post_id, {"user_id": request.user_id})
+        self.db.commit()
+        if unliked is not None:
+            self.counter.add(request.post_id, -1)
+        return post_service_pb2.LikePostResponse(changed=unliked is not None, likes=self._likes(request.post_id))
+
+    def get_like_counts(self, request: post_service_pb2.GetLikeCountsRequest) -> post_service_pb2.GetLikeCountsResponse:
+        post_ids = list(dict.fromkeys(request.post_ids))
+        if len(post_ids) > MAX_BATCH_GET_POSTS:
+            raise ValueError(f"At most {MAX_BATCH_GET_POSTS} posts can be requested at once")
+        response = post_service_pb2.GetLikeCountsResponse()
+        if not post_ids:
+            return response
+
+        rows = self.db.execute(
+            select(Post.id, func.coalesce(PostLikeCount.likes, 0), PostLike.id.is_not(None))
+            .outerjoin(PostLikeCount, PostLikeCount.post_id == Post.id)
+            .outerjoin(PostLike, (PostLike.post_id == Post.id) & (PostLike.user_id == request.user_id))
+            .where(Post.id.in_(post_ids), PostService._visible_to(request.user_id))
+        ).all()
+        by_id = {post_id: (likes, liked) for post_id, likes, liked in rows}
+        for post_id in post_ids:
+            if post_id in by_id:
+                likes, liked = by_id[post_id]
+                response.counts.add(post_id=post_id, likes=likes + self.counter.pending(post_id), liked=liked)
+        return response
+
+    def _likes(self, post_id: str) -> int:
+        stored = self.db.query(PostLikeCount.likes).filter(PostLikeCount.post_id == post_id).scalar()
+        return (stored or 0) + self.counter.pending(post_id)
+
+# Writes the buffered deltas with one upsert per batch. Rows are sorted so concurrent
+# flushes from several instances lock counter rows in the same order; deltas of posts
+# deleted in the meantime are dropped by the join.
+def flush_like_counts(db: Session, counter: CounterBuffer, batch_size: int = LIKE_FLUSH_BATCH_SIZE) -> int:
+    deltas = counter.drain()
+    if not deltas:
+        return 0
+    try:
+        rows = sorted(deltas.items())
+        for start in range(0, len(rows), batch_size):
+            batch = values(column("post_id", String), column("likes", BigInteger), name="deltas").data(
+                rows[start:start + batch_size]
+            )
+            stmt = insert(PostLikeCount).from_select(
+                ["post_id", "likes"],
+                select(batch.c.post_id, batch.c.likes).join(Post, Post.id == batch.c.post_id)
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[PostLikeCount.post_id],
+                set_={"likes": PostLikeCount.likes + stmt.excluded.likes}
+            )
+            db.execute(stmt)
+        db.commit()
+    except BaseException:
+        # Cancellation included: the drained deltas go back before anything else can fail
+        counter.restore()
+        db.rollback()
+        raise
+    counter.commit()
+    return len(rows)
\ No newline at end of file
@@ -0,0 +1,193 @@
+import asyncio
+import gzip
+import json
+import os
+import urllib.request
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import Row, delete, func, select, update
+from sqlalchemy.orm import Session
+from models.outbox import OutboxEvent
+
+OUTBOX_BROKER = os.getenv("OUTBOX_BROKER", "http")
+OUTBOX_DIR = os.getenv("OUTBOX_DIR", "outbox")
+OUTBOX_TOPIC = os.getenv("OUTBOX_TOPIC", "posts")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+OUTBOX_LEASE = float(os.getenv("OUTBOX_LEASE", "30"))
+OUTBOX_COMPRESSION = os.getenv("OUTBOX_COMPRESSION", "gzip")
+OUTBOX_HTTP_URL = os.getenv("OUTBOX_HTTP_URL", "http://statistics_service:8000/events")
+OUTBOX_HTTP_TIMEOUT = float(os.getenv("OUTBOX_HTTP_TIMEOUT", "10"))
+
+POST_CREATED = "post_created"
+POST_UPDATED = "post_updated"
+POST_DELETED = "post_deleted"
+POST_LIKED = "post_liked"
+POST_UNLIKED = "post_unliked"
+COMMENT_CREATED = "comment_created"
+
+# Added to the caller's session, so the event commits or rolls back with the change
+def record_event(db: Session, event_type: str, post_id: str, payload: dict):
+    db.add(OutboxEvent(event_type=event_type, post_id=post_id, payload=payload))
+
+def record_events(db: Session, events: List[Tuple[str, str, dict]]):
+    db.add_all(OutboxEvent(event_type=event_type, post_id=post_id, payload=payload) for event_type, post_id, payload in events)
+
+class Broker:
+    # Must only return once the batch is stored; raising leaves the events in the outbox
+    async def publish(self, topic: str, body: bytes, headers: Dict[str, str]):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+# Stand-in for tests: keeps every batch in memory
+class InMemoryBroker(Broker):
+    def __init__(self):
+        self.batches: List[Tuple[str, bytes, Dict[str, str]]] = []
+
+    async def publish(self, topic: str, body: bytes, headers: Dict[str, str]):
+        self.batches.append((topic, body, headers))
+
+    def events(self, topic: Optional[str] = None) -> List[dict]:
+        return [
+            event
+            for batch_topic, body, headers in self.batches
+            if topic is None or batch_topic == topic
+            for event in decode_batch(body, headers)
+        ]
+
+# Stand-in for local runs: one file per batch under <directory>/<topic>, renamed into
+# place once fully written so readers never see a partial batch
+class FileBroker(Broker):
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    async def publish(self, topic: str, body: bytes, headers: Dict[str, str]):
+        await asyncio.to_thread(self._write, topic, body, headers)
+
+    def _write(self, topic: str, body: bytes, headers: Dict[str, str]):
+        directory = os.path.join(self.directory, topic)
+        os.makedirs(directory, exist_ok=True)
+        name = f"{headers['first_event_id']:0>20}-{headers['last_event_id']:0>20}.ndjson"
+        if headers.get("content-encoding") == "gzip":
+            name += ".gz"
+        path = os.path.join(directory, name)
+        with open(path + ".tmp", "wb") as file:
+            file.write(body)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + ".tmp", path)
+
+# POSTs each batch as is (NDJSON, Content-Encoding from the batch) to an HTTP consumer
+# such as the statistics service; any non-2xx response fails the publish
+class HttpBroker(Broker):
+    def __init__(self, url: str, timeout: float = OUTBOX_HTTP_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    async def publish(self, topic: str, body: bytes, headers: Dict[str, str]):
+        await asyncio.to_thread(self._post, topic, body, headers)
+
+    def _post(self, topic: str, body: bytes, headers: Dict[str, str]):
+        request_headers = {"Content-Type": headers["content-type"], "X-Topic": topic}
+        if "content-encoding" in headers:
+            request_headers["Content-Encoding"] = headers["content-encoding"]
+        request = urllib.request.Request(self.url, data=body, headers=request_headers, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+def create_broker() -> Broker:
+    if OUTBOX_BROKER == "memory":
+        return InMemoryBroker()
+    if OUTBOX_BROKER == "file":
+        return FileBroker(OUTBOX_DIR)
+    if OUTBOX_BROKER == "http":
+        return HttpBroker(OUTBOX_HTTP_URL)
+    raise ValueError(f"Unknown OUTBOX_BROKER: {OUTBOX_BROKER}")
+
+# Newline-delimited JSON, optionally gzipped
+def encode_batch(events: List[Row], compression: str = OUTBOX_COMPRESSION) -> Tuple[bytes, Dict[str, str]]:
+    body = b"\n".join(
+        json.dumps({
+            "id": event.id,
+            "type": event.event_type,
+            "post_id": event.post_id,
+            "created_at": event.created_at.isoformat(),
+            "data": event.payload
+        }, separators=(",", ":")).encode()
+        for event in events
+    )
+    headers = {
+        "content-type": "application/x-ndjson",
+        "count": str(len(events)),
+        "first_event_id": str(events[0].id),
+        "last_event_id": str(events[-1].id)
+    }
+    if compression == "gzip":
+        body = gzip.compress(body)
+        headers["content-encoding"] = "gzip"
+    return body, headers
+
+def decode_batch(body: bytes, headers: Dict[str, str]) -> List[dict]:
+    if headers.get("content-encoding") == "gzip":
+        body = gzip.decompress(body)
+    return [json.loads(line) for line in body.splitlines()]
+
+# Moves outbox rows to the broker with at-least-once delivery: a batch is claimed
+# (SKIP LOCKED, so several instances can relay side by side) and leased, published
+# outside any transaction, then deleted. A relay that dies or fails to publish leaves the
+# lease to expire and the batch is sent again, so consumers dedupe by event id.
+class OutboxRelay:
+    def __init__(
+        self,
+        broker: Broker,
+        topic: str = OUTBOX_TOPIC,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        lease: float = OUTBOX_LEASE,
+        compression: str = OUTBOX_COMPRESSION
+    ):
+        self.broker = broker
+        self.topic = topic
+        self.batch_size = batch_size
+        self.lease = lease
+        self.compression = compression
+        self.published = 0
+
+    def claim(self, db: Session) -> List[Row]:
+        available = (
+            select(OutboxEvent.id)
+            .where(OutboxEvent.available_at <= func.now())
+            .order_by(OutboxEvent.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        events = db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(available.scalar_subquery()))
+            .values(
+                available_at=func.now() + timedelta(seconds=self.lease),
+                attempts=OutboxEvent.attempts + 1
+            )
+            .returning(
+                OutboxEvent.id, OutboxEvent.event_type, OutboxEvent.post_id, OutboxEvent.payload, OutboxEvent.created_at
+            )
+        ).all()
+        db.commit()
+        return sorted(events, key=lambda event: event.id)
+
+    def ack(self, db: Session, event_ids: List[int]):
+        db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(event_ids)))
+        db.commit()
+
+    # run executes a function with a session: session.run_sync on the aio server
+    async def relay_once(self, run: Callable[[Callable[[Session], object]], Awaitable]) -> int:
+        events = await run(self.claim)
+        if not events:
+            return 0
+        body, headers = encode_batch(events, self.compression)
+        await self.broker.publish(self.topic, body, headers)
+        event_ids = [event.id for event in events]
+        await run(lambda db: self.ack(db, event_ids))
+        self.published += len(events)
+        return len(events)
\ No newline at end of file
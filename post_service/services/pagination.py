@@ -0,0 +1,44 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Microseconds since the epoch: post versions (expected_version) and comment path segments
+def timestamp_micros(timestamp: datetime) -> int:
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+def encode_page_token(created_at: datetime, post_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), post_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_page_token(token: str) -> Tuple[datetime, str]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, post_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(post_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid page token")
+
+def encode_search_token(rank: float, post_id: str) -> str:
+    raw = json.dumps([rank, post_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_search_token(token: str) -> Tuple[float, str]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        rank, post_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(rank), str(post_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid page token")
+
+def encode_comment_token(path: str) -> str:
+    return base64.urlsafe_b64encode(path.encode()).decode().rstrip("=")
+
+def decode_comment_token(token: str) -> str:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return base64.urlsafe_b64decode(padded.encode()).decode()
+    except (ValueError, TypeError):
+        raise ValueError("Invalid page token")
@@ -1,12 +1,38 @@
-from datetime import datetime
-from uuid import UUID
-from sqlalchemy.orm import Session
-from models.post import Post
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+from uuid import UUID, uuid4
+from sqlalchemy import REAL, Select, cast, func, insert, literal, select, tuple_, update
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.util import await_only
+from models.post import Post, SEARCH_CONFIG
+from services.pagination import (
+    EPOCH, encode_page_token, decode_page_token, encode_search_token, decode_search_token, timestamp_micros
+)
+from services.outbox import POST_CREATED, POST_DELETED, POST_UPDATED, record_event, record_events
 import post_service_pb2
 
+MAX_BATCH_GET_POSTS = 100
+IMPORT_COLUMNS = ("id", "title", "description", "creator_id", "is_private", "tags")
+EXPORT_CHUNK_SIZE = 500
+MAX_SEARCH_PAGE_SIZE = 100
+MAX_EXPORT_CHUNK_SIZE = 5000
+UPDATABLE_FIELDS = ("title", "description", "is_private", "tags")
+COMPACT_COLUMNS = (Post.id, Post.title, Post.creator_id, Post.created_at, Post.updated_at, Post.is_private, Post.tags)
+
+class InvalidArgument(ValueError):
+    pass
+
+class PreconditionFailed(Exception):
+    pass
+
 class PostService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, cache=None, total_cache=None):
         self.db = db
+        self.cache = cache
+        self.total_cache = total_cache
 
     def create_post(self, request: post_service_pb2.CreatePostRequest) -> post_service_pb2.Post:
         post = Post(
@@ -17,36 +43,148 @@ class PostService:
             tags=list(request.tags)
         )
         self.db.add(post)
-        self.db.commit()
+        self.db.flush()
         self.db.refresh(post)
-        return self._post_to_proto(post)
+        record_event(self.db, POST_CREATED, post.id, post.to_dict())
+        proto = self._post_to_proto(post)
+        self.db.commit()
+        return proto
+
+    def import_posts(self, requests: List[post_service_pb2.CreatePostRequest]) -> post_service_pb2.ImportBatchResult:
+        rows = [
+            (str(uuid4()), request.title, request.description, request.creator_id, request.is_private, list(request.tags))
+            for request in requests
+            if request.title and request.creator_id
+        ]
+        result = post_service_pb2.ImportBatchResult(failed=len(requests) - len(rows))
+        if result.failed:
+            result.error = f"{result.failed} posts without title or creator_id"
+        if not rows:
+            return result
+
+        try:
+            self._copy_posts(rows)
+            record_events(self.db, [(POST_CREATED, row[0], dict(zip(IMPORT_COLUMNS, row))) for row in rows])
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            result.failed += len(rows)
+            result.error = str(getattr(e, "orig", None) or e)
+            return result
+
+        result.imported = len(rows)
+        return result
+
+    def _copy_posts(self, rows: List[tuple]):
+        # COPY through whichever driver the session runs on, multi-row INSERT otherwise
+        driver_connection = self.db.connection().connection.driver_connection
+        if hasattr(driver_connection, "copy_records_to_table"):
+            # asyncpg under the aio server: PostService runs inside run_sync's greenlet
+            await_only(driver_connection.copy_records_to_table(
+                Post.__tablename__, records=rows, columns=IMPORT_COLUMNS
+            ))
+            return
+
+        with driver_connection.cursor() as cursor:
+            if hasattr(cursor, "copy_expert"):
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+                for row in rows:
+                    writer.writerow(row[:-1] + (self._pg_array(row[-1]),))
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY {Post.__tablename__} ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+                return
+
+        self.db.execute(insert(Post), [dict(zip(IMPORT_COLUMNS, row)) for row in rows])
+
+    @staticmethod
+    def _pg_array(values: List[str]) -> str:
+        escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for value in values)
+        return "{" + ",".join(f'"{value}"' for value in escaped) + "}"
 
     def get_post(self, request: post_service_pb2.GetPostRequest) -> post_service_pb2.Post:
-        post = self.db.query(Post).filter(Post.id == request.post_id).first()
-        if not post:
-            raise ValueError("Post not found")
+        post = self._get_cached(request.post_id)
+        if post is None:
+            db_post = self.db.query(Post).filter(Post.id == request.post_id).first()
+            if not db_post:
+                raise ValueError("Post not found")
+            post = self._post_to_proto(db_post)
+            # add, not set: an update or delete may have invalidated the post after the read
+            if self.cache is not None:
+                self.cache.add(post.id, post.SerializeToString())
         
+        # Checked on every read: cached entries are shared between users
         if post.is_private and post.creator_id != request.user_id:
             raise PermissionError("You don't have permission to view this post")
         
-        return self._post_to_proto(post)
+        return post
+
+    def batch_get_posts(self, request: post_service_pb2.BatchGetPostsRequest) -> List[post_service_pb2.Post]:
+        post_ids = list(dict.fromkeys(request.post_ids))
+        if len(post_ids) > MAX_BATCH_GET_POSTS:
+            raise ValueError(f"At most {MAX_BATCH_GET_POSTS} posts can be requested at once")
+        if not post_ids:
+            return []
+
+        posts = (
+            self.db.query(Post)
+            .filter(Post.id.in_(post_ids), self._visible_to(request.user_id))
+            .all()
+        )
+        by_id = {post.id: post for post in posts}
+        return [self._post_to_proto(by_id[post_id]) for post_id in post_ids if post_id in by_id]
 
     def update_post(self, request: post_service_pb2.UpdatePostRequest) -> post_service_pb2.Post:
-        post = self.db.query(Post).filter(Post.id == request.post_id).first()
-        if not post:
+        if request.HasField("update_mask"):
+            paths = list(request.update_mask.paths)
+            unknown = [path for path in paths if path not in UPDATABLE_FIELDS]
+            if unknown:
+                raise InvalidArgument(f"Unknown update_mask fields: {', '.join(unknown)}")
+        else:
+            # No mask: every field is replaced, as before field masks existed
+            paths = list(UPDATABLE_FIELDS)
+        values = {path: getattr(request, path) for path in paths}
+        if "tags" in values:
+            values["tags"] = list(values["tags"])
+        version = func.coalesce(Post.updated_at, Post.created_at)
+        if not values:
+            post = self.db.query(Post).filter(Post.id == request.post_id).first()
+            self._check_owner(post and post.creator_id, request.user_id)
+            if request.expected_version and timestamp_micros(post.updated_at or post.created_at) != request.expected_version:
+                raise PreconditionFailed("Post was modified")
+            return self._post_to_proto(post)
+
+        # Ownership check, version check, merge and read-back in a single statement
+        conditions = [Post.id == request.post_id, Post.creator_id == request.user_id]
+        if request.expected_version:
+            conditions.append(version == EPOCH + timedelta(microseconds=request.expected_version))
+        post = self.db.scalars(
+            update(Post)
+            .where(*conditions)
+            .values(**values)
+            .returning(Post),
+            execution_options={"synchronize_session": False}
+        ).first()
+        if post is None:
+            self.db.rollback()
+            creator_id = self.db.query(Post.creator_id).filter(Post.id == request.post_id).scalar()
+            self._check_owner(creator_id, request.user_id)
+            raise PreconditionFailed("Post was modified")
+        record_event(self.db, POST_UPDATED, post.id, post.to_dict())
+        proto = self._post_to_proto(post)
+        self.db.commit()
+        self._invalidate(request.post_id)
+        return proto
+
+    @staticmethod
+    def _check_owner(creator_id: Optional[str], user_id: str):
+        if creator_id is None:
             raise ValueError("Post not found")
-        
-        if post.creator_id != request.user_id:
+        if creator_id != user_id:
             raise PermissionError("You can't update this post")
-        
-        post.title = request.title
-        post.description = request.description
-        post.is_private = request.is_private
-        post.tags = list(request.tags)
-        
-        self.db.commit()
-        self.db.refresh(post)
-        return self._post_to_proto(post)
 
     def delete_post(self, request: post_service_pb2.DeletePostRequest) -> bool:
         post = self.db.query(Post).filter(Post.id == request.post_id).first()
@@ -57,36 +195,205 @@ class PostService:
             raise PermissionError("You can't delete this post")
         
         self.db.delete(post)
+        record_event(self.db, POST_DELETED, post.id, {"id": post.id, "creator_id": post.creator_id})
         self.db.commit()
+        self._invalidate(post.id)
         return True
 
     def list_posts(self, request: post_service_pb2.ListPostsRequest) -> post_service_pb2.ListPostsResponse:
         query = self.db.query(Post)
+        if request.view == post_service_pb2.VIEW_COMPACT:
+            # description stays out of the SELECT
+            query = query.options(load_only(*COMPACT_COLUMNS))
         
         # Filter private posts if user is not the creator
-        query = query.filter(
-            (Post.is_private == False) | 
-            (Post.is_private == True) & (Post.creator_id == request.user_id)
-        )
+        query = query.filter(self._visible_to(request.user_id))
         
-        total = query.count()
+        # Both use the GIN index on tags
+        if request.tags_any:
+            query = query.filter(Post.tags.overlap(list(request.tags_any)))
+        if request.tags_all:
+            query = query.filter(Post.tags.contains(list(request.tags_all)))
+        
+        if request.page_token or request.page <= 0:
+            return self._list_posts_keyset(query, request)
+
         posts = query.offset((request.page - 1) * request.page_size).limit(request.page_size).all()
         
-        return post_service_pb2.ListPostsResponse(
-            posts=[self._post_to_proto(post) for post in posts],
-            total=total,
+        response = post_service_pb2.ListPostsResponse(
+            posts=[self._post_to_proto(post, request.view) for post in posts],
             page=request.page,
             page_size=request.page_size
         )
+        total = self._count_total(query, request, keyset=False)
+        if total is not None:
+            response.total = total
+        return response
+
+    def _list_posts_keyset(self, query, request: post_service_pb2.ListPostsRequest) -> post_service_pb2.ListPostsResponse:
+        # Newest first; (created_at, id) is unique and backed by ix_posts_created_at_id
+        if request.page_size <= 0:
+            raise ValueError("page_size must be positive")
+
+        response = post_service_pb2.ListPostsResponse(page=0, page_size=request.page_size)
+        total = self._count_total(query, request, keyset=True)
+        if total is not None:
+            response.total = total
+
+        if request.page_token:
+            created_at, post_id = decode_page_token(request.page_token)
+            query = query.filter(tuple_(Post.created_at, Post.id) < tuple_(created_at, post_id))
+
+        posts = (
+            query.order_by(Post.created_at.desc(), Post.id.desc())
+            .limit(request.page_size + 1)
+            .all()
+        )
+        if len(posts) > request.page_size:
+            posts = posts[:request.page_size]
+            last = posts[-1]
+            response.next_page_token = encode_page_token(last.created_at, last.id)
+
+        response.posts.extend(self._post_to_proto(post, request.view) for post in posts)
+        return response
+
+    def _count_total(self, query, request: post_service_pb2.ListPostsRequest, keyset: bool) -> Optional[int]:
+        strategy = request.total_strategy
+        if strategy == post_service_pb2.TOTAL_DEFAULT:
+            exact = not keyset or request.include_total
+            strategy = post_service_pb2.TOTAL_EXACT if exact else post_service_pb2.TOTAL_NONE
+
+        if strategy == post_service_pb2.TOTAL_NONE:
+            return None
+        if strategy == post_service_pb2.TOTAL_ESTIMATED:
+            return self._estimate_count(query)
+        if strategy == post_service_pb2.TOTAL_CACHED and self.total_cache is not None:
+            key = "|".join([
+                request.user_id,
+                ",".join(sorted(request.tags_any)),
+                ",".join(sorted(request.tags_all))
+            ])
+            total = self.total_cache.get(key)
+            if total is None:
+                total = query.count()
+                self.total_cache.set(key, total)
+            return total
+        return query.count()
+
+    def _estimate_count(self, query) -> int:
+        # Planner row estimate for the filtered query: reads statistics, not rows
+        connection = self.db.connection()
+        compiled = query.statement.compile(dialect=connection.dialect)
+        if compiled.positional:
+            params = tuple(compiled.params[name] for name in compiled.positiontup)
+        else:
+            params = compiled.params
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def search_posts(self, request: post_service_pb2.SearchPostsRequest) -> post_service_pb2.SearchPostsResponse:
+        if not request.query.strip():
+            raise ValueError("query must not be empty")
+        page_size = min(request.page_size or 10, MAX_SEARCH_PAGE_SIZE)
+
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, request.query)
+        rank = func.ts_rank(Post.search_vector, ts_query)
+        query = self.db.query(Post, rank).filter(
+            Post.search_vector.op("@@")(ts_query),
+            self._visible_to(request.user_id)
+        )
+        if request.page_token:
+            last_rank, last_id = decode_search_token(request.page_token)
+            # ts_rank returns real: compare in real so the rank round-trips exactly
+            query = query.filter(tuple_(rank, Post.id) < tuple_(cast(literal(last_rank), REAL), last_id))
 
-    def _post_to_proto(self, post: Post) -> post_service_pb2.Post:
-        return post_service_pb2.Post(
+        rows = query.order_by(rank.desc(), Post.id.desc()).limit(page_size + 1).all()
+        response = post_service_pb2.SearchPostsResponse()
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last_post, last_rank = rows[-1]
+            response.next_page_token = encode_search_token(last_rank, last_post.id)
+        response.posts.extend(self._post_to_proto(post) for post, _ in rows)
+        return response
+
+    def export_statement(self, request: post_service_pb2.ExportPostsRequest) -> Select:
+        statement = select(Post).where(self._visible_to(request.user_id))
+        if request.creator_id:
+            statement = statement.where(Post.creator_id == request.creator_id)
+        if request.created_from:
+            statement = statement.where(Post.created_at >= self._parse_datetime(request.created_from))
+        if request.created_to:
+            statement = statement.where(Post.created_at < self._parse_datetime(request.created_to))
+        if request.tags_any:
+            statement = statement.where(Post.tags.overlap(list(request.tags_any)))
+        if request.resume_token:
+            created_at, post_id = decode_page_token(request.resume_token)
+            statement = statement.where(tuple_(Post.created_at, Post.id) > tuple_(created_at, post_id))
+
+        chunk_size = min(request.chunk_size or EXPORT_CHUNK_SIZE, MAX_EXPORT_CHUNK_SIZE)
+        # yield_per streams rows from a server-side cursor, chunk_size rows at a time
+        return (
+            statement.order_by(Post.created_at, Post.id)
+            .execution_options(yield_per=chunk_size)
+        )
+
+    def export_posts(self, request: post_service_pb2.ExportPostsRequest) -> Iterator[post_service_pb2.ExportPostsChunk]:
+        for posts in self.db.scalars(self.export_statement(request)).partitions():
+            yield self.export_chunk(posts)
+
+    def export_chunk(self, posts: List[Post]) -> post_service_pb2.ExportPostsChunk:
+        last = posts[-1]
+        return post_service_pb2.ExportPostsChunk(
+            posts=[self._post_to_proto(post) for post in posts],
+            resume_token=encode_page_token(last.created_at, last.id)
+        )
+
+    @staticmethod
+    def _parse_datetime(value: str) -> datetime:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid datetime: {value}")
+
+    def _get_cached(self, post_id: str) -> Optional[post_service_pb2.Post]:
+        if self.cache is None:
+            return None
+        data = self.cache.get(post_id)
+        return post_service_pb2.Post.FromString(data) if data is not None else None
+
+    def _invalidate(self, post_id: str):
+        if self.cache is not None:
+            self.cache.invalidate(post_id)
+
+    @staticmethod
+    def _visible_to(user_id: str):
+        return (Post.is_private == False) | (Post.is_private == True) & (Post.creator_id == user_id)
+
+    # For likes and comments: the post has to exist and be visible to the user
+    @staticmethod
+    def check_visible(db: Session, post_id: str, user_id: str):
+        post = db.query(Post.creator_id, Post.is_private).filter(Post.id == post_id).first()
+        if post is None:
+            raise ValueError("Post not found")
+        if post.is_private and post.creator_id != user_id:
+            raise PermissionError("You don't have access to this post")
+
+    def _post_to_proto(self, post: Post, view: int = post_service_pb2.VIEW_FULL) -> post_service_pb2.Post:
+        proto = post_service_pb2.Post(
             id=post.id,
             title=post.title,
-            description=post.description,
             creator_id=post.creator_id,
-            created_at=post.created_at.isoformat(),
-            updated_at=post.updated_at.isoformat() if post.updated_at else "",
             is_private=post.is_private,
             tags=post.tags
-        )
\ No newline at end of file
+        )
+        proto.created_at_ts.FromDatetime(post.created_at)
+        if post.updated_at:
+            proto.updated_at_ts.FromDatetime(post.updated_at)
+        if view == post_service_pb2.VIEW_COMPACT:
+            return proto
+        proto.description = post.description or ""
+        proto.created_at = post.created_at.isoformat()
+        proto.updated_at = post.updated_at.isoformat() if post.updated_at else ""
+        return proto
\ No newline at end of file
@@ -0,0 +1,12 @@
+import pytest
+from models.database import Base, engine, get_db
+
+@pytest.fixture(scope="function")
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = next(get_db())
+    try:
+        yield db
+    finally:
+        db.rollback()
+        Base.metadata.drop_all(bind=engine)
\ No newline at end of file
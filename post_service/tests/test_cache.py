@@ -0,0 +1,36 @@
+import time
+from services.cache import LocalCache
+
+def test_local_cache_lru_eviction():
+    cache = LocalCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"hits": 3, "misses": 1, "evictions": 1, "size": 2}
+
+def test_local_cache_ttl_and_delete():
+    cache = LocalCache(max_size=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+    cache.ttl = 60
+    cache.set("b", 2)
+    cache.delete("b")
+    assert cache.get("b") is None
+def test_local_cache_invalidate_blocks_stale_add():
+    cache = LocalCache(max_size=10, ttl=60, invalidation_ttl=0.01)
+    assert cache.add("a", "old")
+    assert not cache.add("a", "other")
+    # A read that started before the update tries to cache what it read
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert not cache.add("a", "old")
+    time.sleep(0.02)
+    assert cache.add("a", "new")
+    assert cache.get("a") == "new"
\ No newline at end of file
@@ -0,0 +1,70 @@
+import pytest
+from services.comment_service import CommentService
+from services.post_service import InvalidArgument, PostService
+import post_service_pb2
+
+@pytest.fixture
+def post(db):
+    return PostService(db).create_post(post_service_pb2.CreatePostRequest(title="Post", creator_id="user1"))
+
+def comment(service, post_id, content, parent_id=""):
+    return service.create_comment(post_service_pb2.CreateCommentRequest(
+        post_id=post_id, parent_id=parent_id, user_id="user2", content=content
+    ))
+
+def list_comments(service, post_id, **kwargs):
+    return service.list_comments(post_service_pb2.ListCommentsRequest(post_id=post_id, user_id="user2", **kwargs))
+
+def test_thread_order(db, post):
+    service = CommentService(db)
+    first = comment(service, post.id, "first")
+    second = comment(service, post.id, "second")
+    reply = comment(service, post.id, "reply", first.id)
+    nested = comment(service, post.id, "nested", reply.id)
+    assert (reply.parent_id, reply.depth, nested.depth) == (first.id, 1, 2)
+
+    # Depth first, siblings oldest first
+    response = list_comments(service, post.id)
+    assert [c.content for c in response.comments] == ["first", "reply", "nested", "second"]
+    assert not response.next_page_token
+
+    # Subtree only, without the parent itself
+    response = list_comments(service, post.id, parent_id=first.id)
+    assert [c.content for c in response.comments] == ["reply", "nested"]
+
+    # One level at a time
+    response = list_comments(service, post.id, max_depth=1)
+    assert [c.content for c in response.comments] == ["first", "second"]
+    response = list_comments(service, post.id, parent_id=first.id, max_depth=1)
+    assert [c.content for c in response.comments] == ["reply"]
+    assert second.id not in {c.id for c in list_comments(service, post.id, parent_id=first.id).comments}
+
+def test_keyset_pagination(db, post):
+    service = CommentService(db)
+    root = comment(service, post.id, "root")
+    for i in range(5):
+        comment(service, post.id, f"reply {i}", root.id)
+
+    contents, token = [], ""
+    while True:
+        response = list_comments(service, post.id, parent_id=root.id, page_size=2, page_token=token)
+        contents += [c.content for c in response.comments]
+        token = response.next_page_token
+        if not token:
+            break
+    assert contents == [f"reply {i}" for i in range(5)]
+
+def test_comment_errors(db, post):
+    service = CommentService(db)
+    with pytest.raises(InvalidArgument):
+        comment(service, post.id, " ")
+    with pytest.raises(ValueError):
+        comment(service, post.id, "reply", "missing")
+    with pytest.raises(InvalidArgument):
+        list_comments(service, post.id, page_token="not a token")
+
+    private = PostService(db).create_post(
+        post_service_pb2.CreatePostRequest(title="Private", creator_id="user1", is_private=True)
+    )
+    with pytest.raises(PermissionError):
+        comment(service, private.id, "hello")
\ No newline at end of file
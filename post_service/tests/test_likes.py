@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from models.like import PostLikeCount
+from services.counters import CounterBuffer
+from services.like_service import LikeService, flush_like_counts
+from services.post_service import PostService
+import post_service_pb2
+
+@pytest.fixture
+def counter():
+    return CounterBuffer()
+
+@pytest.fixture
+def post(db):
+    return PostService(db).create_post(post_service_pb2.CreatePostRequest(title="Post", creator_id="user1"))
+
+def like(service, post_id, user_id):
+    return service.like_post(post_service_pb2.LikePostRequest(post_id=post_id, user_id=user_id))
+
+def test_like_is_idempotent(db, counter, post):
+    service = LikeService(db, counter)
+    assert like(service, post.id, "user2").changed
+    assert not like(service, post.id, "user2").changed
+    assert like(service, post.id, "user3").likes == 2
+
+    # Nothing is written to the counter row until the flush
+    assert db.query(PostLikeCount).count() == 0
+    assert flush_like_counts(db, counter) == 1
+    assert db.query(PostLikeCount.likes).scalar() == 2
+    assert counter.pending(post.id) == 0
+
+    response = service.unlike_post(post_service_pb2.LikePostRequest(post_id=post.id, user_id="user2"))
+    assert response.changed and response.likes == 1
+    assert not service.unlike_post(post_service_pb2.LikePostRequest(post_id=post.id, user_id="user2")).changed
+
+def test_get_like_counts(db, counter, post):
+    service = LikeService(db, counter)
+    private = PostService(db).create_post(
+        post_service_pb2.CreatePostRequest(title="Private", creator_id="user1", is_private=True)
+    )
+    like(service, post.id, "user2")
+    flush_like_counts(db, counter)
+    like(service, post.id, "user3")
+
+    response = service.get_like_counts(
+        post_service_pb2.GetLikeCountsRequest(post_ids=[post.id, private.id, "missing"], user_id="user2")
+    )
+    assert [(count.post_id, count.likes, count.liked) for count in response.counts] == [(post.id, 2, True)]
+
+    with pytest.raises(PermissionError):
+        like(service, private.id, "user2")
+    with pytest.raises(ValueError):
+        like(service, "missing", "user2")
+
+def test_counter_buffer_restore(counter):
+    counter.add("a", 2)
+    assert counter.drain() == {"a": 2}
+    # In flight deltas still count
+    assert counter.pending("a") == 2
+    counter.add("a", 1)
+    counter.restore()
+    assert counter.drain() == {"a": 3}
+    counter.commit()
+    assert counter.pending("a") == 0
+
+def test_flush_skips_deleted_posts(db, counter, post):
+    counter.add(post.id, 1)
+    counter.add("deleted", 5)
+    flush_like_counts(db, counter)
+    assert db.query(PostLikeCount.post_id, PostLikeCount.likes).all() == [(post.id, 1)]
+
+def test_cancelled_flush_is_restored(db, counter, post, monkeypatch):
+    counter.add(post.id, 2)
+    def cancelled(*args, **kwargs):
+        raise asyncio.CancelledError()
+    monkeypatch.setattr(db, "execute", cancelled)
+    with pytest.raises(asyncio.CancelledError):
+        flush_like_counts(db, counter)
+    monkeypatch.undo()
+    assert counter.pending(post.id) == 2
+    assert flush_like_counts(db, counter) == 1
+    assert db.query(PostLikeCount.likes).scalar() == 2
\ No newline at end of file
@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from models.outbox import OutboxEvent
+from services.comment_service import CommentService
+from services.counters import CounterBuffer
+from services.like_service import LikeService
+from services.outbox import FileBroker, InMemoryBroker, OutboxRelay, decode_batch
+from services.post_service import PostService
+import post_service_pb2
+
+def relay_once(db, relay):
+    async def run(method):
+        return method(db)
+    return asyncio.run(relay.relay_once(run))
+
+def create_post(db, title):
+    return PostService(db).create_post(post_service_pb2.CreatePostRequest(title=title, creator_id="user1"))
+
+def test_writes_are_relayed_in_batches(db):
+    service = PostService(db)
+    post = create_post(db, "First")
+    create_post(db, "Second")
+    service.update_post(post_service_pb2.UpdatePostRequest(post_id=post.id, user_id="user1", title="Updated"))
+    service.delete_post(post_service_pb2.DeletePostRequest(post_id=post.id, user_id="user1"))
+    assert db.query(OutboxEvent).count() == 4
+
+    broker = InMemoryBroker()
+    relay = OutboxRelay(broker, batch_size=3)
+    assert relay_once(db, relay) == 3
+    assert relay_once(db, relay) == 1
+    assert relay_once(db, relay) == 0
+    assert db.query(OutboxEvent).count() == 0
+
+    assert broker.batches[0][2]["content-encoding"] == "gzip"
+    events = broker.events()
+    assert [event["type"] for event in events] == ["post_created", "post_created", "post_updated", "post_deleted"]
+    assert events[2]["data"]["title"] == "Updated"
+    assert events[3]["post_id"] == post.id
+
+def test_rolled_back_write_has_no_event(db):
+    service = PostService(db)
+    post = create_post(db, "Post")
+    with pytest.raises(PermissionError):
+        service.delete_post(post_service_pb2.DeletePostRequest(post_id=post.id, user_id="user2"))
+    assert [event.event_type for event in db.query(OutboxEvent)] == ["post_created"]
+
+def test_failed_publish_is_retried(db, tmp_path):
+    class FailingBroker(InMemoryBroker):
+        async def publish(self, topic, body, headers):
+            raise ConnectionError("broker is down")
+
+    create_post(db, "Post")
+    with pytest.raises(ConnectionError):
+        relay_once(db, OutboxRelay(FailingBroker(), lease=0))
+    assert db.query(OutboxEvent.attempts).scalar() == 1
+
+    # The lease has expired, so the next relay publishes the batch again
+    relay = OutboxRelay(FileBroker(str(tmp_path)), compression="none")
+    assert relay_once(db, relay) == 1
+    files = list((tmp_path / "posts").iterdir())
+    assert len(files) == 1 and files[0].suffix == ".ndjson"
+    assert decode_batch(files[0].read_bytes(), {})[0]["data"]["title"] == "Post"
+
+def test_likes_and_comments_are_recorded(db):
+    post = create_post(db, "Post")
+    likes = LikeService(db, CounterBuffer())
+    like = post_service_pb2.LikePostRequest(post_id=post.id, user_id="user2")
+    likes.like_post(like)
+    likes.like_post(like)
+    likes.unlike_post(like)
+    CommentService(db).create_comment(
+        post_service_pb2.CreateCommentRequest(post_id=post.id, user_id="user2", content="Hello")
+    )
+    # Repeated likes change nothing and record nothing
+    events = db.query(OutboxEvent.event_type).order_by(OutboxEvent.id).all()
+    assert [event_type for event_type, in events] == ["post_created", "post_liked", "post_unliked", "comment_created"]
\ No newline at end of file
@@ -1,20 +1,11 @@
 import pytest
-from datetime import datetime
-from models.database import Base, engine, get_db
+from datetime import datetime, timezone
 from models.post import Post
-from services.post_service import PostService
+from services.pagination import timestamp_micros
+from services.post_service import InvalidArgument, PostService, PreconditionFailed
+from services.cache import LocalCache
 import post_service_pb2
 
-@pytest.fixture(scope="function")
-def db():
-    Base.metadata.create_all(bind=engine)
-    db = next(get_db())
-    try:
-        yield db
-    finally:
-        db.rollback()
-        Base.metadata.drop_all(bind=engine)
-
 @pytest.fixture
 def post_service(db):
     return PostService(db)
@@ -108,6 +99,53 @@ def test_update_post(post_service):
     with pytest.raises(PermissionError):
         post_service.update_post(update_request)
 
+def test_update_post_with_mask(post_service):
+    created_post = post_service.create_post(post_service_pb2.CreatePostRequest(
+        title="Test Post",
+        description="Test Description",
+        creator_id="user1",
+        tags=["a"]
+    ))
+
+    update_request = post_service_pb2.UpdatePostRequest(post_id=created_post.id, title="Updated Title", user_id="user1")
+    update_request.update_mask.paths.append("title")
+    updated_post = post_service.update_post(update_request)
+    assert updated_post.title == "Updated Title"
+    assert updated_post.description == "Test Description"
+    assert updated_post.tags == ["a"]
+    assert updated_post.updated_at
+
+    update_request.user_id = "user2"
+    with pytest.raises(PermissionError):
+        post_service.update_post(update_request)
+
+    update_request.post_id = "missing"
+    with pytest.raises(ValueError):
+        post_service.update_post(update_request)
+
+    update_request.update_mask.paths.append("creator_id")
+    with pytest.raises(InvalidArgument):
+        post_service.update_post(update_request)
+
+def test_update_post_expected_version(post_service):
+    created_post = post_service.create_post(post_service_pb2.CreatePostRequest(title="Test Post", creator_id="user1"))
+    version = timestamp_micros(datetime.fromisoformat(created_post.created_at))
+
+    update_request = post_service_pb2.UpdatePostRequest(
+        post_id=created_post.id, title="First", user_id="user1", expected_version=version
+    )
+    update_request.update_mask.paths.append("title")
+    updated_post = post_service.update_post(update_request)
+    assert updated_post.title == "First"
+
+    # The same version is stale now
+    update_request.title = "Second"
+    with pytest.raises(PreconditionFailed):
+        post_service.update_post(update_request)
+
+    update_request.expected_version = timestamp_micros(datetime.fromisoformat(updated_post.updated_at))
+    assert post_service.update_post(update_request).title == "Second"
+
 def test_delete_post(post_service):
     # Create a post
     create_request = post_service_pb2.CreatePostRequest(
@@ -189,4 +227,243 @@ def test_list_posts(post_service):
     assert len(response.posts) == 3
     assert response.page == 1
     assert response.page_size == 3
-    assert response.total == 6
\ No newline at end of file
+    assert response.total == 6
+
+def test_list_posts_keyset(post_service):
+    for i in range(1, 6):
+        post_service.create_post(
+            post_service_pb2.CreatePostRequest(
+                title=f"Post {i}",
+                description=f"Description {i}",
+                creator_id="user1"
+            )
+        )
+    post_service.create_post(
+        post_service_pb2.CreatePostRequest(
+            title="Hidden",
+            description="Private",
+            creator_id="user2",
+            is_private=True
+        )
+    )
+
+    list_request = post_service_pb2.ListPostsRequest(
+        page=0,
+        page_size=2,
+        user_id="user1",
+        include_total=True
+    )
+    titles = []
+    response = post_service.list_posts(list_request)
+    assert response.total == 5
+    while True:
+        titles.extend(post.title for post in response.posts)
+        if not response.next_page_token:
+            break
+        list_request = post_service_pb2.ListPostsRequest(
+            page_size=2,
+            user_id="user1",
+            page_token=response.next_page_token
+        )
+        response = post_service.list_posts(list_request)
+        assert not response.HasField("total")
+
+    # Newest first, every visible post exactly once
+    assert titles == [f"Post {i}" for i in range(5, 0, -1)]
+
+    with pytest.raises(ValueError):
+        post_service.list_posts(
+            post_service_pb2.ListPostsRequest(page_size=2, user_id="user1", page_token="garbage")
+        )
+
+def test_batch_get_posts(post_service):
+    public = post_service.create_post(
+        post_service_pb2.CreatePostRequest(title="Public", description="", creator_id="user1")
+    )
+    private = post_service.create_post(
+        post_service_pb2.CreatePostRequest(title="Private", description="", creator_id="user1", is_private=True)
+    )
+
+    request = post_service_pb2.BatchGetPostsRequest(
+        post_ids=[private.id, "missing", public.id, private.id],
+        user_id="user1"
+    )
+    assert [post.id for post in post_service.batch_get_posts(request)] == [private.id, public.id]
+
+    request.user_id = "user2"
+    assert [post.id for post in post_service.batch_get_posts(request)] == [public.id]
+
+    with pytest.raises(ValueError):
+        post_service.batch_get_posts(
+            post_service_pb2.BatchGetPostsRequest(post_ids=[str(i) for i in range(101)], user_id="user1")
+        )
+
+def test_import_posts(post_service):
+    requests = [
+        post_service_pb2.CreatePostRequest(title=f"Imported {i}", creator_id="user1", tags=["import", 'a,"b"\\'])
+        for i in range(50)
+    ]
+    requests.append(post_service_pb2.CreatePostRequest(title="No creator"))
+
+    result = post_service.import_posts(requests)
+    assert result.imported == 50
+    assert result.failed == 1
+    assert result.error
+
+    response = post_service.list_posts(
+        post_service_pb2.ListPostsRequest(page=1, page_size=100, user_id="user1")
+    )
+    assert response.total == 50
+    assert all(list(post.tags) == ["import", 'a,"b"\\'] for post in response.posts)
+    assert all(post.description == "" for post in response.posts)
+
+def test_export_posts(post_service):
+    for i in range(7):
+        post_service.create_post(
+            post_service_pb2.CreatePostRequest(
+                title=f"Post {i}",
+                description="",
+                creator_id="user1",
+                tags=["even"] if i % 2 == 0 else ["odd"]
+            )
+        )
+    post_service.create_post(
+        post_service_pb2.CreatePostRequest(title="Other", description="", creator_id="user2", tags=["even"])
+    )
+
+    request = post_service_pb2.ExportPostsRequest(
+        user_id="user1",
+        creator_id="user1",
+        tags_any=["even"],
+        chunk_size=2
+    )
+    chunks = list(post_service.export_posts(request))
+    assert [len(chunk.posts) for chunk in chunks] == [2, 2]
+    assert [post.title for chunk in chunks for post in chunk.posts] == ["Post 0", "Post 2", "Post 4", "Post 6"]
+
+    # Resume after the first chunk
+    request.resume_token = chunks[0].resume_token
+    resumed = list(post_service.export_posts(request))
+    assert [post.title for chunk in resumed for post in chunk.posts] == ["Post 4", "Post 6"]
+
+    with pytest.raises(ValueError):
+        list(post_service.export_posts(post_service_pb2.ExportPostsRequest(created_from="yesterday")))
+
+def test_get_post_cached(db):
+    cache = LocalCache(max_size=100, ttl=60)
+    post_service = PostService(db, cache=cache)
+    post = post_service.create_post(
+        post_service_pb2.CreatePostRequest(title="Cached", description="", creator_id="user1", is_private=True)
+    )
+    get_request = post_service_pb2.GetPostRequest(post_id=post.id, user_id="user1")
+
+    assert post_service.get_post(get_request).title == "Cached"
+    assert post_service.get_post(get_request).title == "Cached"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Private posts are still checked on a cache hit
+    with pytest.raises(PermissionError):
+        post_service.get_post(post_service_pb2.GetPostRequest(post_id=post.id, user_id="user2"))
+
+    post_service.update_post(
+        post_service_pb2.UpdatePostRequest(post_id=post.id, title="Updated", user_id="user1", is_private=True)
+    )
+    assert post_service.get_post(get_request).title == "Updated"
+
+    post_service.delete_post(post_service_pb2.DeletePostRequest(post_id=post.id, user_id="user1"))
+    with pytest.raises(ValueError):
+        post_service.get_post(get_request)
+
+def test_list_posts_by_tags(post_service):
+    for title, tags in [("Python", ["python"]), ("Both", ["python", "sql"]), ("SQL", ["sql"]), ("None", [])]:
+        post_service.create_post(
+            post_service_pb2.CreatePostRequest(title=title, description="", creator_id="user1", tags=tags)
+        )
+
+    def titles(**filters):
+        request = post_service_pb2.ListPostsRequest(page=1, page_size=10, user_id="user1", **filters)
+        return {post.title for post in post_service.list_posts(request).posts}
+
+    assert titles(tags_any=["python", "sql"]) == {"Python", "Both", "SQL"}
+    assert titles(tags_all=["python", "sql"]) == {"Both"}
+    assert titles(tags_any=["sql"], tags_all=["python"]) == {"Both"}
+
+def test_list_posts_compact_view(post_service):
+    created = post_service.create_post(
+        post_service_pb2.CreatePostRequest(title="Title", description="Long description", creator_id="user1")
+    )
+
+    request = post_service_pb2.ListPostsRequest(page=0, page_size=10, user_id="user1", view=post_service_pb2.VIEW_COMPACT)
+    post = post_service.list_posts(request).posts[0]
+    assert post.title == "Title"
+    assert post.description == ""
+    assert post.created_at == ""
+    assert post.created_at_ts.ToDatetime(tzinfo=timezone.utc) == datetime.fromisoformat(created.created_at).astimezone(timezone.utc)
+    assert not post.HasField("updated_at_ts")
+
+    request.view = post_service_pb2.VIEW_FULL
+    assert post_service.list_posts(request).posts[0].description == "Long description"
+
+def test_search_posts(post_service):
+    for i in range(5):
+        post_service.create_post(
+            post_service_pb2.CreatePostRequest(
+                title=f"Gardening tips {i}",
+                description="tomatoes " * (i + 1),
+                creator_id="user1"
+            )
+        )
+    post_service.create_post(
+        post_service_pb2.CreatePostRequest(title="Tomatoes", description="", creator_id="user1")
+    )
+    post_service.create_post(
+        post_service_pb2.CreatePostRequest(title="Secret tomatoes", description="", creator_id="user2", is_private=True)
+    )
+    post_service.create_post(
+        post_service_pb2.CreatePostRequest(title="Unrelated", description="cars", creator_id="user1")
+    )
+
+    request = post_service_pb2.SearchPostsRequest(query="tomatoes", user_id="user1", page_size=2)
+    response = post_service.search_posts(request)
+    # Title matches outrank description matches
+    assert response.posts[0].title == "Tomatoes"
+
+    titles = [post.title for post in response.posts]
+    while response.next_page_token:
+        request.page_token = response.next_page_token
+        response = post_service.search_posts(request)
+        titles.extend(post.title for post in response.posts)
+
+    assert len(titles) == 6
+    assert set(titles) == {"Tomatoes"} | {f"Gardening tips {i}" for i in range(5)}
+
+    with pytest.raises(ValueError):
+        post_service.search_posts(post_service_pb2.SearchPostsRequest(query=" ", user_id="user1"))
+
+def test_list_posts_total_strategies(db):
+    post_service = PostService(db, total_cache=LocalCache(max_size=100, ttl=60))
+    for i in range(3):
+        post_service.create_post(
+            post_service_pb2.CreatePostRequest(title=f"Post {i}", description="", creator_id="user1", tags=["t"])
+        )
+
+    def total(strategy, **kwargs):
+        request = post_service_pb2.ListPostsRequest(
+            page=1, page_size=10, user_id="user1", tags_any=["t"], total_strategy=strategy, **kwargs
+        )
+        response = post_service.list_posts(request)
+        return response.total if response.HasField("total") else None
+
+    assert total(post_service_pb2.TOTAL_EXACT) == 3
+    assert total(post_service_pb2.TOTAL_NONE) is None
+    assert total(post_service_pb2.TOTAL_CACHED) == 3
+
+    # Cached totals are served until the TTL expires
+    post_service.create_post(
+        post_service_pb2.CreatePostRequest(title="Post 3", description="", creator_id="user1", tags=["t"])
+    )
+    assert total(post_service_pb2.TOTAL_CACHED) == 3
+    assert total(post_service_pb2.TOTAL_EXACT) == 4
+
+    estimate = total(post_service_pb2.TOTAL_ESTIMATED)
+    assert isinstance(estimate, int) and estimate >= 0
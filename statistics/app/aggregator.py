@@ -0,0 +1,165 @@
+import asyncio
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from . import crud
+from .routes.config import settings
+
+COUNTERS = ("views", "likes", "comments")
+GRANULARITIES = ("minute", "hour")
+# Event type -> (counter index, delta). Gateway view events and post_service outbox
+# events share the endpoint; other outbox events (post_created, ...) are ignored.
+EVENT_COUNTERS = {
+    "view": (0, 1),
+    "post_liked": (1, 1),
+    "post_unliked": (1, -1),
+    "comment_created": (2, 1),
+}
+
+# (granularity, bucket_start)
+BucketKey = Tuple[str, datetime]
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+def parse_timestamp(value: Optional[str]) -> datetime:
+    if not value:
+        return datetime.now(timezone.utc)
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+def _new_counts() -> List[int]:
+    return [0] * len(COUNTERS)
+
+def _new_buckets() -> Dict[BucketKey, List[int]]:
+    return defaultdict(_new_counts)
+
+def _add(target: List[int], counts: List[int]):
+    for i, count in enumerate(counts):
+        target[i] += count
+
+# Events only touch in-memory totals and minute/hour buckets; flush() turns everything
+# collected since the last flush into a few batched upserts, so the number of writes
+# depends on how many posts and buckets were active, not on the number of events.
+class Aggregator:
+    def __init__(self, dedup_window: int = settings.STATS_DEDUP_WINDOW):
+        self.dedup_window = dedup_window
+        self.accepted = 0
+        self.ignored = 0
+        self.duplicates = 0
+        self._totals: Dict[str, List[int]] = defaultdict(_new_counts)
+        # Grouped by post, so a time series query only looks at that post's buckets
+        self._buckets: Dict[str, Dict[BucketKey, List[int]]] = defaultdict(_new_buckets)
+        # Rows handed to the database but not committed yet; still counted by pending()
+        self._in_flight: Tuple[Dict, Dict] = ({}, {})
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        # One flush at a time, so a finished flush means everything added before it is stored
+        self._flush_lock = asyncio.Lock()
+
+    def add(self, event: dict) -> bool:
+        counter = EVENT_COUNTERS.get(event.get("type"))
+        post_id = event.get("post_id")
+        if counter is None or not post_id:
+            self.ignored += 1
+            return False
+        # Outbox delivery is at-least-once; its events carry an id
+        event_id = event.get("id")
+        if event_id is not None:
+            event_id = str(event_id)
+            if event_id in self._seen:
+                self.duplicates += 1
+                return False
+            self._seen[event_id] = None
+            if len(self._seen) > self.dedup_window:
+                self._seen.popitem(last=False)
+
+        index, delta = counter
+        timestamp = parse_timestamp(event.get("timestamp") or event.get("created_at"))
+        self._totals[post_id][index] += delta
+        for granularity in GRANULARITIES:
+            self._buckets[post_id][(granularity, bucket_start(timestamp, granularity))][index] += delta
+        self.accepted += 1
+        return True
+
+    def drain(self) -> Tuple[Dict[str, List[int]], Dict[str, Dict[BucketKey, List[int]]]]:
+        totals, buckets = self._totals, self._buckets
+        self._totals, self._buckets = defaultdict(_new_counts), defaultdict(_new_buckets)
+        self._in_flight = (totals, buckets)
+        return totals, buckets
+
+    def commit(self):
+        self._in_flight = ({}, {})
+
+    # Puts a failed flush back, so it is retried with the next one
+    def restore(self):
+        totals, buckets = self._in_flight
+        for post_id, counts in totals.items():
+            _add(self._totals[post_id], counts)
+        for post_id, post_buckets in buckets.items():
+            for key, counts in post_buckets.items():
+                _add(self._buckets[post_id][key], counts)
+        self._in_flight = ({}, {})
+
+    def pending(self, post_id: str) -> List[int]:
+        counts = _new_counts()
+        for totals in (self._totals, self._in_flight[0]):
+            if post_id in totals:
+                _add(counts, totals[post_id])
+        return counts
+
+    def pending_buckets(self, post_id: str, granularity: str) -> Dict[datetime, List[int]]:
+        result: Dict[datetime, List[int]] = defaultdict(_new_counts)
+        for buckets in (self._buckets, self._in_flight[1]):
+            for (bucket_granularity, start), counts in buckets.get(post_id, {}).items():
+                if bucket_granularity == granularity:
+                    _add(result[start], counts)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "accepted": self.accepted,
+            "ignored": self.ignored,
+            "duplicates": self.duplicates,
+            "pending_posts": len(self._totals),
+            "pending_buckets": sum(len(post_buckets) for post_buckets in self._buckets.values()),
+        }
+
+    async def flush(self, batch_size: int = settings.STATS_FLUSH_BATCH_SIZE) -> int:
+        async with self._flush_lock:
+            totals, buckets = self.drain()
+            if not totals:
+                self.commit()
+                return 0
+            try:
+                await crud.upsert_statistics(totals, buckets, batch_size)
+            except Exception:
+                self.restore()
+                raise
+            self.commit()
+            return len(totals)
+
+aggregator = Aggregator()
+
+# Runs until stop is set; an ongoing flush is never interrupted
+async def flush_periodically(stop: asyncio.Event):
+    last_purge = datetime.now(timezone.utc)
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), settings.STATS_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await aggregator.flush()
+        except Exception as e:
+            print(f"Statistics flush failed, retrying with the next one: {e}")
+        now = datetime.now(timezone.utc)
+        if now - last_purge >= timedelta(hours=1):
+            last_purge = now
+            try:
+                await crud.purge_minute_buckets(now - timedelta(hours=settings.MINUTE_BUCKET_RETENTION_HOURS))
+            except Exception as e:
+                print(f"Minute bucket purge failed: {e}")
\ No newline at end of file
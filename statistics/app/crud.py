@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from . import models
+from .database import async_session_maker
+
+def _increment(table, stmt):
+    return {
+        column: getattr(table, column) + getattr(stmt.excluded, column)
+        for column in ("views_count", "likes_count", "comments_count")
+    }
+
+def _chunks(rows: List[dict], size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+# Adds the deltas in one transaction, a multi-row upsert per batch. Rows are sorted so
+# concurrent flushes from several instances lock them in the same order.
+async def upsert_statistics(totals: Dict[str, List[int]], buckets: Dict[str, Dict], batch_size: int):
+    total_rows = [
+        {"post_id": post_id, "views_count": views, "likes_count": likes, "comments_count": comments}
+        for post_id, (views, likes, comments) in sorted(totals.items())
+    ]
+    bucket_rows = [
+        {
+            "post_id": post_id,
+            "granularity": granularity,
+            "bucket_start": start,
+            "views_count": views,
+            "likes_count": likes,
+            "comments_count": comments
+        }
+        for post_id, post_buckets in sorted(buckets.items())
+        for (granularity, start), (views, likes, comments) in sorted(post_buckets.items())
+    ]
+    async with async_session_maker() as session:
+        for rows in _chunks(total_rows, batch_size):
+            stmt = insert(models.PostStatistics).values(rows)
+            await session.execute(stmt.on_conflict_do_update(
+                index_elements=[models.PostStatistics.post_id],
+                set_={**_increment(models.PostStatistics, stmt), "updated_at": func.now()}
+            ))
+        for rows in _chunks(bucket_rows, batch_size):
+            stmt = insert(models.PostStatisticsBucket).values(rows)
+            await session.execute(stmt.on_conflict_do_update(
+                index_elements=[
+                    models.PostStatisticsBucket.post_id,
+                    models.PostStatisticsBucket.granularity,
+                    models.PostStatisticsBucket.bucket_start
+                ],
+                set_=_increment(models.PostStatisticsBucket, stmt)
+            ))
+        await session.commit()
+
+async def get_post_statistics(post_id: str) -> models.PostStatistics | None:
+    async with async_session_maker() as session:
+        stmt = select(models.PostStatistics).where(models.PostStatistics.post_id == post_id)
+        result = await session.execute(stmt)
+        return result.scalars().first()
+
+async def get_buckets(post_id: str, granularity: str, since: datetime, until: datetime) -> List[models.PostStatisticsBucket]:
+    async with async_session_maker() as session:
+        stmt = (
+            select(models.PostStatisticsBucket)
+            .where(
+                models.PostStatisticsBucket.post_id == post_id,
+                models.PostStatisticsBucket.granularity == granularity,
+                models.PostStatisticsBucket.bucket_start >= since,
+                models.PostStatisticsBucket.bucket_start < until
+            )
+            .order_by(models.PostStatisticsBucket.bucket_start)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+async def purge_minute_buckets(before: datetime) -> int:
+    async with async_session_maker() as session:
+        result = await session.execute(
+            delete(models.PostStatisticsBucket).where(
+                models.PostStatisticsBucket.granularity == "minute",
+                models.PostStatisticsBucket.bucket_start < before
+            )
+        )
+        await session.commit()
+        return result.rowcount
\ No newline at end of file
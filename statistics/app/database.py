@@ -0,0 +1,8 @@
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import declarative_base
+from .routes.config import settings
+
+Base = declarative_base()
+
+engine = create_async_engine(settings.DATABASE_URL)
+async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
\ No newline at end of file
@@ -0,0 +1,29 @@
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from .aggregator import aggregator, flush_periodically
+from . import models
+from .database import Base, engine
+from .routes import events, stats, trending
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    stop = asyncio.Event()
+    flusher = asyncio.create_task(flush_periodically(stop))
+    yield
+    stop.set()
+    await flusher
+    try:
+        await aggregator.flush()
+    except Exception as e:
+        print(f"Final statistics flush failed: {e}")
+    print(f"Events: {aggregator.stats()}")
+    await engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+
+app.include_router(events.router, prefix="/events")
+app.include_router(stats.router, prefix="/stats/posts")
+app.include_router(trending.router, prefix="/stats/trending")
\ No newline at end of file
@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, Column, DateTime, String
+from sqlalchemy.sql import func
+from .database import Base
+
+class PostStatistics(Base):
+    __tablename__ = "post_statistics"
+    post_id = Column(String, primary_key=True)
+    views_count = Column(BigInteger, nullable=False, default=0)
+    likes_count = Column(BigInteger, nullable=False, default=0)
+    comments_count = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Counters per post and minute / hour; the primary key serves time series range scans
+class PostStatisticsBucket(Base):
+    __tablename__ = "post_statistics_buckets"
+    post_id = Column(String, primary_key=True)
+    granularity = Column(String, primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    views_count = Column(BigInteger, nullable=False, default=0)
+    likes_count = Column(BigInteger, nullable=False, default=0)
+    comments_count = Column(BigInteger, nullable=False, default=0)
\ No newline at end of file
@@ -0,0 +1,47 @@
+import gzip
+from collections import Counter
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import ValidationError
+from .. import schemas
+from ..aggregator import aggregator
+from ..trending import trending
+from .config import settings
+
+router = APIRouter()
+
+# Accepts {"events": [...]} from the gateway and the NDJSON batches (optionally gzipped)
+# of post_service's outbox. Gateway views are only counted in memory and written by the
+# periodic flush, so a crash loses up to a flush interval of them; that is deliberate, the
+# gateway does not retry them anyway. Outbox batches are flushed before the response:
+# the relay deletes a batch once it gets a 2xx, so the counts must be stored by then.
+@router.post("", status_code=202, response_model=schemas.EventsAccepted)
+async def ingest_events(request: Request):
+    body = await request.body()
+    try:
+        if request.headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        outbox = request.headers.get("content-type", "").startswith("application/x-ndjson")
+        if outbox:
+            events = [schemas.Event.model_validate_json(line) for line in body.splitlines() if line.strip()]
+        else:
+            events = schemas.EventBatch.model_validate_json(body).events
+    except (OSError, EOFError, ValueError, ValidationError):
+        raise HTTPException(status_code=400, detail="Invalid event batch")
+    if len(events) > settings.MAX_EVENTS_PER_REQUEST:
+        raise HTTPException(status_code=413, detail=f"At most {settings.MAX_EVENTS_PER_REQUEST} events per request")
+
+    # Trending sketches are updated once per post and type of the batch
+    accepted = Counter()
+    for event in events:
+        if aggregator.add(event.model_dump()):
+            accepted[(event.type, event.post_id)] += 1
+    trending.add_events(accepted)
+    if outbox:
+        # A failed flush keeps the counts pending and the relay sends the batch again;
+        # its events are then skipped as duplicates, so nothing is counted twice
+        try:
+            await aggregator.flush()
+        except Exception as e:
+            print(f"Outbox batch could not be stored: {e}")
+            raise HTTPException(status_code=503, detail="Events could not be stored, retry later")
+    return {"accepted": sum(accepted.values())}
\ No newline at end of file
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException
+from .. import crud, schemas
+from ..aggregator import aggregator, bucket_start
+
+router = APIRouter()
+
+DEFAULT_RANGES = {"minute": timedelta(hours=1), "hour": timedelta(days=1)}
+MAX_POINTS = 1440
+
+# Counters include events that are still waiting for the next flush
+@router.get("/{post_id}", response_model=schemas.PostStatisticsResponse)
+async def get_post_statistics(post_id: str):
+    stored = await crud.get_post_statistics(post_id)
+    views, likes, comments = aggregator.pending(post_id)
+    if stored is not None:
+        views += stored.views_count
+        likes += stored.likes_count
+        comments += stored.comments_count
+    return {"post_id": post_id, "views": views, "likes": likes, "comments": comments}
+
+@router.get("/{post_id}/timeseries", response_model=schemas.TimeSeriesResponse)
+async def get_post_timeseries(
+    post_id: str,
+    granularity: Literal["minute", "hour"] = "minute",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    until = _as_utc(until) if until else datetime.now(timezone.utc)
+    since = _as_utc(since) if since else until - DEFAULT_RANGES[granularity]
+    step = timedelta(minutes=1) if granularity == "minute" else timedelta(hours=1)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    if (until - since) / step > MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_POINTS} points can be requested at once")
+
+    points = {
+        bucket.bucket_start: [bucket.views_count, bucket.likes_count, bucket.comments_count]
+        for bucket in await crud.get_buckets(post_id, granularity, bucket_start(since, granularity), until)
+    }
+    for start, counts in aggregator.pending_buckets(post_id, granularity).items():
+        if bucket_start(since, granularity) <= start < until:
+            stored = points.setdefault(start, [0, 0, 0])
+            for i, count in enumerate(counts):
+                stored[i] += count
+    return {
+        "post_id": post_id,
+        "granularity": granularity,
+        "points": [
+            {"bucket_start": start, "views": views, "likes": likes, "comments": comments}
+            for start, (views, likes, comments) in sorted(points.items())
+        ]
+    }
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
\ No newline at end of file
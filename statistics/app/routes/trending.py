@@ -0,0 +1,21 @@
+from typing import Literal
+from fastapi import APIRouter, Query
+from .. import schemas
+from ..trending import trending
+from .config import settings
+
+router = APIRouter()
+
+@router.get("", response_model=schemas.TrendingResponse)
+async def get_trending(
+    metric: Literal["views", "likes"] = "views",
+    limit: int = Query(10, ge=1, le=settings.MAX_TRENDING_LIMIT)
+):
+    return {
+        "metric": metric,
+        "window_seconds": settings.TRENDING_WINDOW_SECONDS,
+        "posts": [
+            {"post_id": post_id, "count": count, "error": error, "missing": missing}
+            for post_id, count, error, missing in trending.top(metric, limit)
+        ]
+    }
\ No newline at end of file
@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class Event(BaseModel):
+    type: str
+    post_id: Optional[str] = None
+    user_id: Optional[str] = None
+    # Outbox events carry an id (used to skip redeliveries) and created_at
+    id: Optional[int] = None
+    timestamp: Optional[str] = None
+    created_at: Optional[str] = None
+
+class EventBatch(BaseModel):
+    events: List[Event]
+
+class EventsAccepted(BaseModel):
+    accepted: int
+
+class PostStatisticsResponse(BaseModel):
+    post_id: str
+    views: int
+    likes: int
+    comments: int
+
+class TimeSeriesPoint(BaseModel):
+    bucket_start: datetime
+    views: int
+    likes: int
+    comments: int
+
+class TimeSeriesResponse(BaseModel):
+    post_id: str
+    granularity: str
+    points: List[TimeSeriesPoint]
+
+class TrendingPost(BaseModel):
+    post_id: str
+    count: int
+    # The true number lies in [count - error, count + missing]
+    error: int
+    missing: int
+
+class TrendingResponse(BaseModel):
+    metric: str
+    window_seconds: float
+    posts: List[TrendingPost]
\ No newline at end of file
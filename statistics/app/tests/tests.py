@@ -0,0 +1,162 @@
+import gzip
+import json
+import random
+import unittest
+from collections import Counter
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from app.aggregator import Aggregator, bucket_start
+from app.main import app
+from app.trending import SlidingTopK, SpaceSaving, Trending
+
+MINUTE = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+def view(post_id, timestamp="2024-05-01T12:30:15+00:00"):
+    return {"type": "view", "post_id": post_id, "user_id": "u1", "timestamp": timestamp}
+
+class TestAggregator(unittest.IsolatedAsyncioTestCase):
+    def test_buckets(self):
+        aggregator = Aggregator()
+        aggregator.add(view("p1"))
+        aggregator.add(view("p1", "2024-05-01T12:31:00+00:00"))
+        aggregator.add({"id": 7, "type": "post_liked", "post_id": "p1", "created_at": "2024-05-01T12:30:59+00:00"})
+        aggregator.add({"id": 8, "type": "post_created", "post_id": "p1"})
+
+        self.assertEqual(aggregator.pending("p1"), [2, 1, 0])
+        self.assertEqual(aggregator.pending_buckets("p1", "minute"), {
+            MINUTE: [1, 1, 0],
+            datetime(2024, 5, 1, 12, 31, tzinfo=timezone.utc): [1, 0, 0],
+        })
+        self.assertEqual(aggregator.pending_buckets("p1", "hour"), {bucket_start(MINUTE, "hour"): [2, 1, 0]})
+        self.assertEqual((aggregator.accepted, aggregator.ignored), (3, 1))
+
+    def test_redelivered_outbox_events_are_skipped(self):
+        aggregator = Aggregator(dedup_window=2)
+        event = {"id": 1, "type": "comment_created", "post_id": "p1"}
+        self.assertTrue(aggregator.add(event))
+        self.assertFalse(aggregator.add(event))
+        aggregator.add({"id": 2, "type": "comment_created", "post_id": "p1"})
+        aggregator.add({"id": 3, "type": "comment_created", "post_id": "p1"})
+        # Fell out of the window
+        self.assertTrue(aggregator.add(event))
+        self.assertEqual(aggregator.duplicates, 1)
+
+    async def test_flush_writes_one_batch(self):
+        aggregator = Aggregator()
+        for _ in range(1000):
+            aggregator.add(view("p1"))
+        aggregator.add(view("p2"))
+        with patch("app.aggregator.crud.upsert_statistics", new_callable=AsyncMock) as upsert:
+            self.assertEqual(await aggregator.flush(), 2)
+        upsert.assert_awaited_once()
+        totals, buckets, _ = upsert.await_args.args
+        self.assertEqual(totals, {"p1": [1000, 0, 0], "p2": [1, 0, 0]})
+        self.assertEqual(buckets["p1"][("minute", MINUTE)], [1000, 0, 0])
+        self.assertEqual(aggregator.pending("p1"), [0, 0, 0])
+
+    async def test_failed_flush_is_restored(self):
+        aggregator = Aggregator()
+        aggregator.add(view("p1"))
+        with patch("app.aggregator.crud.upsert_statistics", new_callable=AsyncMock, side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                await aggregator.flush()
+        aggregator.add(view("p1"))
+        self.assertEqual(aggregator.pending("p1"), [2, 0, 0])
+        self.assertEqual(aggregator.pending_buckets("p1", "minute"), {MINUTE: [2, 0, 0]})
+
+class TestEvents(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def test_gateway_batch(self):
+        with patch("app.routes.events.aggregator", Aggregator()) as aggregator:
+            response = self.client.post("/events", json={"events": [view("p1"), view("p2")]})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {"accepted": 2})
+        self.assertEqual(aggregator.pending("p2"), [1, 0, 0])
+
+    def test_outbox_batch(self):
+        lines = [
+            {"id": 1, "type": "post_liked", "post_id": "p1", "created_at": "2024-05-01T12:30:00+00:00", "data": {}},
+            {"id": 2, "type": "post_updated", "post_id": "p1", "created_at": "2024-05-01T12:30:00+00:00", "data": {}},
+        ]
+        body = gzip.compress("\n".join(json.dumps(line) for line in lines).encode())
+        with patch("app.routes.events.aggregator", Aggregator()) as aggregator, \
+                patch("app.aggregator.crud.upsert_statistics", new_callable=AsyncMock) as upsert:
+            response = self.client.post(
+                "/events",
+                content=body,
+                headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"}
+            )
+        self.assertEqual(response.json(), {"accepted": 1})
+        # Stored before the relay is told to delete the batch
+        upsert.assert_awaited_once()
+        self.assertEqual(upsert.await_args.args[0], {"p1": [0, 1, 0]})
+        self.assertEqual(aggregator.pending("p1"), [0, 0, 0])
+
+    def test_outbox_batch_not_stored(self):
+        body = json.dumps({"id": 1, "type": "post_liked", "post_id": "p1", "data": {}}).encode()
+        headers = {"Content-Type": "application/x-ndjson"}
+        with patch("app.routes.events.aggregator", Aggregator()) as aggregator:
+            with patch("app.aggregator.crud.upsert_statistics", new_callable=AsyncMock, side_effect=ConnectionError):
+                response = self.client.post("/events", content=body, headers=headers)
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(aggregator.pending("p1"), [0, 1, 0])
+            # The relay's retry is a duplicate and only stores what is still pending
+            with patch("app.aggregator.crud.upsert_statistics", new_callable=AsyncMock) as upsert:
+                response = self.client.post("/events", content=body, headers=headers)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {"accepted": 0})
+        self.assertEqual(upsert.await_args.args[0], {"p1": [0, 1, 0]})
+
+    def test_invalid_batch(self):
+        response = self.client.post("/events", content=b"not json", headers={"Content-Type": "application/json"})
+        self.assertEqual(response.status_code, 400)
+
+class TestTrending(unittest.TestCase):
+    def test_space_saving_keeps_heavy_hitters(self):
+        rng = random.Random(42)
+        stream = [f"p{min(int(rng.paretovariate(1.2)), 100000)}" for _ in range(200000)]
+        exact = Counter(stream)
+        summary = SpaceSaving(capacity=100)
+        for key in stream:
+            summary.add(key)
+
+        self.assertEqual(len(summary.counters), 100)
+        top = sorted(summary.counters.items(), key=lambda item: -item[1][0])[:10]
+        self.assertEqual([key for key, _ in top], [key for key, _ in exact.most_common(10)])
+        for key, (count, error) in summary.counters.items():
+            self.assertLessEqual(count - error, exact[key])
+            self.assertGreaterEqual(count, exact[key])
+            self.assertLessEqual(error, len(stream) // 100)
+
+    def test_sliding_window(self):
+        top_k = SlidingTopK(window=60, slots=6, capacity=10)
+        top_k.add("old", 100, now=0)
+        top_k.add("new", 5, now=55)
+        self.assertEqual([key for key, *_ in top_k.top(2, now=59)], ["old", "new"])
+        # "old" was counted in the first slot, which has left the window
+        self.assertEqual(top_k.top(2, now=65), [("new", 5, 0, 0)])
+
+    def test_window_bounds(self):
+        top_k = SlidingTopK(window=60, slots=2, capacity=2)
+        exact = Counter()
+        for now, key, weight in [(0, "a", 10), (0, "b", 5), (31, "c", 7), (31, "d", 6), (31, "a", 1)]:
+            top_k.add(key, weight, now=now)
+            exact[key] += weight
+        result = {key: (count, error, missing) for key, count, error, missing in top_k.top(4, now=35)}
+        # "d" was evicted by "a" in the second slot, "b" is missing from it
+        self.assertEqual(result["a"], (17, 6, 0))
+        self.assertEqual(result["b"], (5, 0, 7))
+        for key, (count, error, missing) in result.items():
+            self.assertLessEqual(count - error, exact[key])
+            self.assertGreaterEqual(count + missing, exact[key])
+
+    def test_trending_route(self):
+        trending = Trending()
+        trending.add_events(Counter({("view", "p1"): 3, ("view", "p2"): 5, ("post_liked", "p1"): 1, ("comment_created", "p1"): 1}))
+        with patch("app.routes.trending.trending", trending):
+            response = TestClient(app).get("/stats/trending", params={"limit": 1})
+        self.assertEqual(response.json()["posts"], [{"post_id": "p2", "count": 5, "error": 0, "missing": 0}])
+        self.assertEqual(trending.top("likes", 10), [("p1", 1, 0, 0)])
\ No newline at end of file
@@ -0,0 +1,116 @@
+import heapq
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from .routes.config import settings
+
+# Event type -> trending metric; unlikes are left out, Space-Saving only counts up
+TRENDING_EVENTS = {"view": "views", "post_liked": "likes"}
+
+# Space-Saving heavy hitters over at most `capacity` keys. Any key counted more than
+# N / capacity times is guaranteed to be kept, and its count overestimates the true one
+# by at most its error (the count of the key it replaced). Increments are O(1) dict
+# updates; the min-heap holds one entry per key and is only fixed up lazily on eviction.
+class SpaceSaving:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.total = 0
+        # key -> [count, error]
+        self.counters: Dict[str, List[int]] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, weight: int = 1):
+        self.total += weight
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += weight
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[key] = [weight, 0]
+            heapq.heappush(self._heap, (weight, key))
+            return
+        # Heap entries may lag behind their counts; the first up to date one is the minimum
+        while True:
+            count, evicted = heapq.heappop(self._heap)
+            if self.counters[evicted][0] == count:
+                break
+            heapq.heappush(self._heap, (self.counters[evicted][0], evicted))
+        del self.counters[evicted]
+        self.counters[key] = [count + weight, count]
+        heapq.heappush(self._heap, (count + weight, key))
+
+    def min_count(self) -> int:
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(count for count, _ in self.counters.values())
+
+# Sliding window of Space-Saving summaries, one per time slot. Slots older than the window
+# are reset and reused, so memory stays at slots * capacity counters whatever the event
+# rate. top() merges the live slots: the slots' errors add up to how much the count may
+# overestimate, and a key missing from a full slot may still have up to that slot's
+# minimum count there, so those minimums add up to how much it may underestimate.
+class SlidingTopK:
+    def __init__(
+        self,
+        window: float = settings.TRENDING_WINDOW_SECONDS,
+        slots: int = settings.TRENDING_SLOTS,
+        capacity: int = settings.TRENDING_CAPACITY
+    ):
+        self.window = window
+        self.slots = slots
+        self.capacity = capacity
+        self.slot_length = window / slots
+        self._slots: List[Tuple[int, SpaceSaving]] = [(-1, SpaceSaving(capacity)) for _ in range(slots)]
+
+    def _slot(self, now: float) -> SpaceSaving:
+        slot_id = int(now // self.slot_length)
+        index = slot_id % self.slots
+        current_id, summary = self._slots[index]
+        if current_id != slot_id:
+            summary = SpaceSaving(self.capacity)
+            self._slots[index] = (slot_id, summary)
+        return summary
+
+    def add(self, key: str, weight: int = 1, now: Optional[float] = None):
+        self._slot(time.time() if now is None else now).add(key, weight)
+
+    # [(key, count, error, missing)] by count; the true count is in [count - error, count + missing]
+    def top(self, k: int, now: Optional[float] = None) -> List[Tuple[str, int, int, int]]:
+        oldest_id = int((time.time() if now is None else now) // self.slot_length) - self.slots + 1
+        live = [summary for slot_id, summary in self._slots if slot_id >= oldest_id]
+        counts: Counter = Counter()
+        errors: Counter = Counter()
+        for summary in live:
+            for key, (count, error) in summary.counters.items():
+                counts[key] += count
+                errors[key] += error
+        missing_bounds = [(summary, summary.min_count()) for summary in live]
+        result = []
+        for key, count in counts.most_common(k):
+            missing = sum(bound for summary, bound in missing_bounds if bound and key not in summary.counters)
+            result.append((key, count, errors[key], missing))
+        return result
+
+class Trending:
+    def __init__(self):
+        self.metrics = {metric: SlidingTopK() for metric in set(TRENDING_EVENTS.values())}
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[Tuple[str, int, int, int]]]] = {}
+
+    # counts: (event type, post_id) -> events, pre-aggregated per ingested batch
+    def add_events(self, counts: Counter, now: Optional[float] = None):
+        for (event_type, post_id), count in counts.items():
+            metric = TRENDING_EVENTS.get(event_type)
+            if metric is not None:
+                self.metrics[metric].add(post_id, count, now)
+
+    # Merging the slots costs slots * capacity, so results are reused for a moment
+    def top(self, metric: str, k: int) -> List[Tuple[str, int, int, int]]:
+        now = time.monotonic()
+        cached = self._cache.get((metric, k))
+        if cached is not None and now - cached[0] < settings.TRENDING_CACHE_SECONDS:
+            return cached[1]
+        result = self.metrics[metric].top(k)
+        self._cache[(metric, k)] = (now, result)
+        return result
+
+trending = Trending()
\ No newline at end of file
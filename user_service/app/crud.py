@@ -1,13 +1,14 @@
-from sqlalchemy import select
+import hashlib
+from typing import List, Optional
+from uuid import UUID as PyUUID
+from sqlalchemy import any_, bindparam, delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from . import models, schemas
-from passlib.context import CryptContext
 from .database import async_session_maker
 from .routes.config import settings
-from datetime import datetime
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .security import hash_password, verify_password
+from datetime import datetime, timedelta
 
 async def get_user_by_username(username: str) -> models.User | None:
     async with async_session_maker() as session:
@@ -21,12 +22,21 @@ async def get_user_by_id(user_id: str) -> models.User | None:
         result = await session.execute(stmt)
         return result.scalars().first()
 
+# One round trip for any number of ids; = ANY(array) keeps a single prepared statement
+async def get_users_by_ids(user_ids: List[PyUUID]) -> list:
+    async with async_session_maker() as session:
+        stmt = select(models.User.id, models.User.username).where(
+            models.User.id == any_(bindparam("ids", list(user_ids), type_=ARRAY(UUID(as_uuid=True))))
+        )
+        result = await session.execute(stmt)
+        return result.all()
+
 async def create_user(user: schemas.UserCreate) -> models.User | None:
     async with async_session_maker() as session:
         if await get_user_by_username(user.username):
             return None
 
-        hashed_password = pwd_context.hash(user.password)
+        hashed_password = await hash_password(user.password)
         db_user = models.User(
             username=user.username,
             password_hash=hashed_password,
@@ -41,10 +51,24 @@ async def create_user(user: schemas.UserCreate) -> models.User | None:
 
 async def authenticate_user(username: str, password: str) -> models.User | None:
     user = await get_user_by_username(username)
-    if not user or not pwd_context.verify(password, user.password_hash):
+    if not user:
+        return None
+    valid, new_hash = await verify_password(password, user.password_hash)
+    if not valid:
         return None
+    if new_hash:
+        # Stored with a different bcrypt cost than configured
+        await update_password_hash(user.id, new_hash)
+        user.password_hash = new_hash
     return user
 
+async def update_password_hash(user_id, password_hash: str):
+    async with async_session_maker() as session:
+        await session.execute(
+            update(models.User).where(models.User.id == user_id).values(password_hash=password_hash)
+        )
+        await session.commit()
+
 async def update_user(user_id: str, user_update: schemas.UserUpdate) -> models.User | None:
     async with async_session_maker() as session:
         stmt = select(models.User).where(models.User.id == user_id)
@@ -60,4 +84,71 @@ async def update_user(user_id: str, user_update: schemas.UserUpdate) -> models.U
 
         await session.commit()
         await session.refresh(db_user)
-        return db_user
\ No newline at end of file
+        return db_user
+
+# Only a digest of the token is stored; the session is identified by the token's sid claim
+def hash_session_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+async def create_session(session_id, user_id, token: str, expires_at: datetime, user_agent: Optional[str] = None):
+    async with async_session_maker() as session:
+        session.add(models.UserSession(
+            id=session_id,
+            user_id=user_id,
+            session_token=hash_session_token(token),
+            user_agent=user_agent,
+            created_at=datetime.utcnow(),
+            expires_at=expires_at
+        ))
+        await session.commit()
+
+# Revokes one session, or every active session of the user when session_id is None.
+# Returns (session id, expires_at) of the sessions that were revoked.
+async def revoke_sessions(user_id, session_id=None) -> list:
+    async with async_session_maker() as session:
+        stmt = (
+            update(models.UserSession)
+            .where(
+                models.UserSession.user_id == user_id,
+                models.UserSession.revoked_at.is_(None),
+                models.UserSession.expires_at > datetime.utcnow()
+            )
+            .values(revoked_at=datetime.utcnow())
+            .returning(models.UserSession.id, models.UserSession.expires_at)
+        )
+        if session_id is not None:
+            stmt = stmt.where(models.UserSession.id == session_id)
+        result = await session.execute(stmt)
+        revoked = result.all()
+        await session.commit()
+        return revoked
+
+# Unexpired sessions revoked after `since` (all of them when since is None), oldest first
+async def get_revoked_sessions(since: Optional[datetime] = None) -> list:
+    async with async_session_maker() as session:
+        stmt = (
+            select(models.UserSession.id, models.UserSession.expires_at, models.UserSession.revoked_at)
+            .where(models.UserSession.revoked_at.is_not(None), models.UserSession.expires_at > datetime.utcnow())
+            .order_by(models.UserSession.revoked_at)
+        )
+        if since is not None:
+            stmt = stmt.where(models.UserSession.revoked_at > since)
+        result = await session.execute(stmt)
+        return result.all()
+
+# Deletes expired sessions batch_size rows per transaction, so the table is never locked for long
+async def purge_expired_sessions(batch_size: int, grace: timedelta = timedelta()) -> int:
+    purged = 0
+    while True:
+        async with async_session_maker() as session:
+            expired = (
+                select(models.UserSession.id)
+                .where(models.UserSession.expires_at < datetime.utcnow() - grace)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = await session.execute(delete(models.UserSession).where(models.UserSession.id.in_(expired)))
+            await session.commit()
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
\ No newline at end of file
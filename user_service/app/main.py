@@ -1,9 +1,24 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Response
 from .routes import auth, users
+from .security import shutdown_executor
+from .sessions import maintain_sessions, revocations
 from fastapi.openapi.utils import get_openapi
 import yaml
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await revocations.refresh()
+    except Exception as e:
+        print(f"Initial revocation load failed: {e}")
+    maintenance = asyncio.create_task(maintain_sessions())
+    yield
+    maintenance.cancel()
+    shutdown_executor()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(auth.router, prefix="/auth")
 app.include_router(users.router, prefix="/users")
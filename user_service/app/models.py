@@ -20,8 +20,10 @@ class User(Base):
 class UserSession(Base):
     __tablename__ = "user_sessions"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), index=True)
     session_token = Column(String, unique=True, nullable=False)
     user_agent = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime)
\ No newline at end of file
+    expires_at = Column(DateTime, index=True)
+    # Set on logout; tokens carrying this session id (sid claim) are rejected from then on
+    revoked_at = Column(DateTime, index=True)
\ No newline at end of file
@@ -1,6 +1,12 @@
-from fastapi import APIRouter, HTTPException, Response, Depends
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import uuid4
+from fastapi import APIRouter, HTTPException, Request, Response, Depends
+from jose import JWTError, jwt
 from .. import schemas, crud
-from .dependencies import create_access_token, validate_user_token
+from ..sessions import REFRESH_OVERLAP, revocations
+from .config import settings
+from .dependencies import create_access_token, validate_user_token, get_jwks, get_verification_key, require_internal_token
 
 router = APIRouter()
 
@@ -12,19 +18,63 @@ async def register(user: schemas.UserCreate):
     return {"message": "User registered successfully"}
 
 @router.post("/login", response_model=schemas.SessionToken)
-async def login(response: Response, user_login: schemas.LoginRequest):
+async def login(request: Request, response: Response, user_login: schemas.LoginRequest):
     user = await crud.authenticate_user(user_login.username, user_login.password)
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
-    session_token = create_access_token(str(user.id))
+    session_id = uuid4()
+    expires_at = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    session_token = create_access_token(str(user.id), session_id=str(session_id), expire=expires_at)
+    await crud.create_session(session_id, user.id, session_token, expires_at, request.headers.get("user-agent"))
     response.set_cookie(key="users_access_token", value=session_token, httponly=True)
     return {"session_token": session_token}
 
 @router.post("/logout")
-async def logout(response: Response):
+async def logout(request: Request, response: Response):
+    claims = get_session_claims(request.cookies.get("users_access_token"))
+    if claims:
+        await revoke(claims["usr"], claims["sid"])
     response.delete_cookie(key="users_access_token")
     return {'message': 'User logout successfully'}
 
+@router.post("/logout-all")
+async def logout_all(response: Response, user_id: str = Depends(validate_user_token)):
+    revoked = await revoke(user_id)
+    response.delete_cookie(key="users_access_token")
+    return {'message': f'{revoked} sessions revoked'}
+
+def get_session_claims(token: Optional[str]) -> Optional[dict]:
+    if not token:
+        return None
+    try:
+        claims = jwt.decode(token, get_verification_key(settings.ALGORITHM), algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if claims.get("usr") is None or claims.get("sid") is None:
+        return None
+    return claims
+
+async def revoke(user_id: str, session_id: Optional[str] = None) -> int:
+    revoked = await crud.revoke_sessions(user_id, session_id)
+    # Effective on this instance right away, on the others after their next refresh
+    for revoked_id, expires_at in revoked:
+        revocations.add(revoked_id, expires_at)
+    return len(revoked)
+
 @router.get("/auth")
 async def auth(user_id: str = Depends(validate_user_token)):
-    return user_id
\ No newline at end of file
+    return user_id
+
+@router.get("/jwks")
+async def jwks():
+    return get_jwks()
+
+# Internal: lets gateways that verify tokens themselves follow revocations incrementally.
+# Pass the previous response's `until` as `since`.
+@router.get("/revocations", dependencies=[Depends(require_internal_token)])
+async def get_revocations(since: Optional[datetime] = None):
+    rows = await crud.get_revoked_sessions(since - REFRESH_OVERLAP if since else None)
+    return {
+        "sessions": [{"id": str(session_id), "expires_at": expires_at} for session_id, expires_at, _ in rows],
+        "until": rows[-1][2] if rows else since
+    }
\ No newline at end of file
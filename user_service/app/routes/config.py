@@ -1,10 +1,26 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # PEM keys for asymmetric ALGORITHM values (RS*/ES*/PS*); the public key is published at /auth/jwks
+    JWT_PRIVATE_KEY: Optional[str] = None
+    JWT_PUBLIC_KEY: Optional[str] = None
+    JWT_KEY_ID: str = "user-service"
+    # bcrypt runs off the event loop in a bounded pool: "thread" or "process"
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    # Changing the cost rehashes passwords on their next successful login
+    PASSWORD_HASH_ROUNDS: int = 12
+    # Seconds between incremental reloads of revoked sessions / purges of expired ones
+    REVOCATION_REFRESH_INTERVAL: float = 5
+    SESSION_PURGE_INTERVAL: float = 3600
+    SESSION_PURGE_BATCH_SIZE: int = 1000
+    # Shared with the gateway for internal endpoints (X-Internal-Token); they are closed while unset
+    INTERNAL_API_TOKEN: Optional[str] = None
 
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".env")
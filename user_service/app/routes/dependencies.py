@@ -1,18 +1,64 @@
-from fastapi import Request, Depends, HTTPException, status
-from jose import JWTError, jwt
+import hmac
+from fastapi import Header, Request, Depends, HTTPException, status
+from jose import JWTError, jwt, jwk
 from .config import settings
 from .. import crud
+from ..sessions import revocations
 from jose import jwt
 from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
 
-def create_access_token(user_id: str):
+ASYMMETRIC_ALGORITHM_PREFIXES = ("RS", "ES", "PS")
+
+def is_asymmetric(algorithm: str) -> bool:
+    return algorithm.upper().startswith(ASYMMETRIC_ALGORITHM_PREFIXES)
+
+def get_signing_key(algorithm: str):
+    if not is_asymmetric(algorithm):
+        return settings.SECRET_KEY
+    if not settings.JWT_PRIVATE_KEY:
+        raise RuntimeError(f"JWT_PRIVATE_KEY is required for {algorithm}")
+    return settings.JWT_PRIVATE_KEY
+
+@lru_cache(maxsize=None)
+def get_verification_key(algorithm: str):
+    if not is_asymmetric(algorithm):
+        return settings.SECRET_KEY
+    if settings.JWT_PUBLIC_KEY:
+        return jwk.construct(settings.JWT_PUBLIC_KEY, algorithm).to_dict()
+    return jwk.construct(get_signing_key(algorithm), algorithm).public_key().to_dict()
+
+def get_jwks() -> dict:
+    # Symmetric secrets are never published: gateways fall back to /auth/auth for them
+    if not is_asymmetric(settings.ALGORITHM):
+        return {"keys": []}
+    key = dict(get_verification_key(settings.ALGORITHM))
+    key.update({"kid": settings.JWT_KEY_ID, "use": "sig"})
+    return {"keys": [key]}
+
+def create_access_token(
+    user_id: str,
+    algorithm: Optional[str] = None,
+    session_id: Optional[str] = None,
+    expire: Optional[datetime] = None
+):
+    algorithm = algorithm or settings.ALGORITHM
     to_encode = {}
-    expire = datetime.utcnow() + timedelta(minutes=30)
+    expire = expire or datetime.utcnow() + timedelta(minutes=30)
     to_encode.update({"exp": expire})
     to_encode.update({"usr": user_id})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    if session_id is not None:
+        to_encode.update({"sid": session_id})
+    headers = {"kid": settings.JWT_KEY_ID} if is_asymmetric(algorithm) else None
+    encoded_jwt = jwt.encode(to_encode, get_signing_key(algorithm), algorithm=algorithm, headers=headers)
     return encoded_jwt
 
+def require_internal_token(x_internal_token: Optional[str] = Header(None)):
+    expected = settings.INTERNAL_API_TOKEN
+    if not expected or not x_internal_token or not hmac.compare_digest(x_internal_token, expected):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Internal endpoint")
+
 def get_token(request: Request):
     token = request.cookies.get('users_access_token')
     if not token:
@@ -26,10 +72,17 @@ async def validate_user_token(users_access_token: str = Depends(get_token)):
             detail="Not authenticated",
         )
     try:
-        payload = jwt.decode(users_access_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(
+            users_access_token,
+            get_verification_key(settings.ALGORITHM),
+            algorithms=[settings.ALGORITHM]
+        )
         user_id: str = payload.get("usr")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
+        # In-memory check only; no database access per request
+        if payload.get("sid") in revocations:
+            raise HTTPException(status_code=401, detail="Session revoked")
         return user_id
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
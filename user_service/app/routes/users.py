@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from .. import schemas, crud
-from .dependencies import get_current_user, validate_user_token
+from .dependencies import get_current_user, require_internal_token, validate_user_token
 
 router = APIRouter()
 
+MAX_BATCH_USERS = 100
+
 @router.get("/me", response_model=schemas.UserResponse)
 async def read_user_me(current_user: schemas.UserResponse = Depends(get_current_user)):
     return current_user
@@ -14,4 +16,12 @@ async def update_user_me(
     user_id: StopAsyncIteration = Depends(validate_user_token)
 ):
     updated_user = await crud.update_user(user_id, user_update)
-    return updated_user
\ No newline at end of file
+    return updated_user
+
+# Internal: used by the gateway to hydrate post authors; only public fields are returned
+@router.post("/batch", response_model=schemas.UserBatchResponse, dependencies=[Depends(require_internal_token)])
+async def get_users_batch(request: schemas.UserBatchRequest):
+    if len(request.ids) > MAX_BATCH_USERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_USERS} users can be requested at once")
+    users = await crud.get_users_by_ids(set(request.ids))
+    return {"users": [{"id": user.id, "username": user.username} for user in users]}
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 class LoginRequest(BaseModel):
@@ -32,6 +32,19 @@ class UserResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class UserBatchRequest(BaseModel):
+    ids: List[UUID]
+
+class UserSummary(BaseModel):
+    id: UUID
+    username: str
+
+    class Config:
+        orm_mode = True
+
+class UserBatchResponse(BaseModel):
+    users: List[UserSummary]
+
 class SessionToken(BaseModel):
     session_token: str
 
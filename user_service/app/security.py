@@ -0,0 +1,46 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+from .routes.config import settings
+
+# min/max pinned to the configured cost so hashes made with any other cost need an update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_HASH_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_HASH_ROUNDS
+)
+
+_executor: Optional[Executor] = None
+
+def get_executor() -> Executor:
+    # bcrypt releases the GIL, so threads are enough; processes isolate it completely
+    global _executor
+    if _executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+# Module level so they can be pickled for the process pool
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_and_update(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, password_hash)
+
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), _hash, password)
+
+# Returns (valid, new_hash); new_hash is set when the stored hash used another cost
+async def verify_password(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), _verify_and_update, password, password_hash)
\ No newline at end of file
@@ -0,0 +1,54 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from . import crud
+from .routes.config import settings
+
+# Re-read a little before the last seen revocation: revoked_at comes from the app clocks,
+# so rows can commit slightly out of order
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+# In-process set of revoked, not yet expired session ids. validate_user_token only looks
+# here; the set follows user_sessions incrementally (by revoked_at) in the background.
+class RevocationList:
+    def __init__(self):
+        self._revoked: Dict[str, datetime] = {}
+        self._watermark: Optional[datetime] = None
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._revoked
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def add(self, session_id, expires_at: datetime):
+        self._revoked[str(session_id)] = expires_at
+
+    async def refresh(self):
+        since = self._watermark - REFRESH_OVERLAP if self._watermark else None
+        for session_id, expires_at, revoked_at in await crud.get_revoked_sessions(since):
+            self.add(session_id, expires_at)
+            if self._watermark is None or revoked_at > self._watermark:
+                self._watermark = revoked_at
+        # Expired tokens are rejected by exp anyway
+        now = datetime.utcnow()
+        self._revoked = {session_id: expires_at for session_id, expires_at in self._revoked.items() if expires_at > now}
+
+revocations = RevocationList()
+
+async def maintain_sessions():
+    purged_at = time.monotonic()
+    while True:
+        await asyncio.sleep(settings.REVOCATION_REFRESH_INTERVAL)
+        try:
+            await revocations.refresh()
+        except Exception as e:
+            print(f"Revocation refresh failed: {e}")
+        if time.monotonic() - purged_at >= settings.SESSION_PURGE_INTERVAL:
+            purged_at = time.monotonic()
+            try:
+                purged = await crud.purge_expired_sessions(settings.SESSION_PURGE_BATCH_SIZE)
+                print(f"Purged {purged} expired sessions")
+            except Exception as e:
+                print(f"Session purge failed: {e}")
\ No newline at end of file
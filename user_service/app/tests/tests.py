@@ -1,10 +1,16 @@
 import unittest
 from unittest.mock import patch, MagicMock, AsyncMock
 from datetime import datetime, timedelta
+from uuid import uuid4
 from fastapi import HTTPException, Request, status
 from jose import jwt
-from app.routes.dependencies import create_access_token, get_token, get_current_user
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from app.routes.dependencies import create_access_token, get_token, get_current_user, get_jwks, get_verification_key, validate_user_token
 from app.routes.config import settings
+from app import crud
+from app.security import pwd_context, hash_password, verify_password
+from app.sessions import RevocationList, revocations
 
 class TestDependencies(unittest.TestCase):
     def setUp(self):
@@ -63,5 +69,137 @@ class TestDependencies(unittest.TestCase):
         self.assertEqual(context.exception.status_code, 404)
         self.assertEqual(context.exception.detail, "User not found")
 
+class TestAsymmetricTokens(unittest.TestCase):
+    def setUp(self):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ).decode()
+        get_verification_key.cache_clear()
+
+    def tearDown(self):
+        get_verification_key.cache_clear()
+
+    def test_jwks_empty_for_symmetric_algorithm(self):
+        with patch.object(settings, "ALGORITHM", "HS256"):
+            self.assertEqual(get_jwks(), {"keys": []})
+
+    def test_rs256_token_verifies_with_published_key(self):
+        with patch.object(settings, "ALGORITHM", "RS256"), \
+                patch.object(settings, "JWT_PRIVATE_KEY", self.private_pem):
+            token = create_access_token("123", algorithm="RS256")
+            [key] = get_jwks()["keys"]
+
+        self.assertEqual(jwt.get_unverified_header(token)["kid"], key["kid"])
+        self.assertNotIn("d", key)
+        payload = jwt.decode(token, key, algorithms=["RS256"])
+        self.assertEqual(payload["usr"], "123")
+
+class TestPasswordHashing(unittest.IsolatedAsyncioTestCase):
+    async def test_hash_and_verify_in_executor(self):
+        password_hash = await hash_password("secret")
+        self.assertEqual(await verify_password("secret", password_hash), (True, None))
+        self.assertEqual(await verify_password("wrong", password_hash), (False, None))
+
+    async def test_rehash_when_cost_changes(self):
+        old_hash = pwd_context.handler("bcrypt").using(rounds=4).hash("secret")
+        valid, new_hash = await verify_password("secret", old_hash)
+        self.assertTrue(valid)
+        self.assertIn(f"${settings.PASSWORD_HASH_ROUNDS}$", new_hash)
+
+    @patch("app.crud.update_password_hash", new_callable=AsyncMock)
+    @patch("app.crud.get_user_by_username", new_callable=AsyncMock)
+    async def test_authenticate_user_rehashes(self, mock_get_user, mock_update_hash):
+        user = MagicMock(id="123", password_hash=pwd_context.handler("bcrypt").using(rounds=4).hash("secret"))
+        mock_get_user.return_value = user
+
+        self.assertIs(await crud.authenticate_user("user", "secret"), user)
+        mock_update_hash.assert_awaited_once_with("123", user.password_hash)
+        self.assertEqual(pwd_context.verify_and_update("secret", user.password_hash), (True, None))
+
+    @patch("app.crud.update_password_hash", new_callable=AsyncMock)
+    @patch("app.crud.get_user_by_username", new_callable=AsyncMock)
+    async def test_authenticate_user_wrong_password(self, mock_get_user, mock_update_hash):
+        mock_get_user.return_value = MagicMock(id="123", password_hash=await hash_password("secret"))
+        self.assertIsNone(await crud.authenticate_user("user", "wrong"))
+        mock_update_hash.assert_not_awaited()
+
+class TestUsersBatch(unittest.TestCase):
+    def setUp(self):
+        from fastapi.testclient import TestClient
+        from app.main import app
+        self.client = TestClient(app, headers={"X-Internal-Token": "internal"})
+        self.token = patch.object(settings, "INTERNAL_API_TOKEN", "internal")
+        self.token.start()
+
+    def tearDown(self):
+        self.token.stop()
+
+    @patch("app.crud.get_users_by_ids", new_callable=AsyncMock)
+    def test_batch_returns_found_users(self, mock_get_users):
+        user_id = uuid4()
+        mock_get_users.return_value = [MagicMock(id=user_id, username="alice")]
+        response = self.client.post("/users/batch", json={"ids": [str(user_id), str(user_id), str(uuid4())]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"users": [{"id": str(user_id), "username": "alice"}]})
+        # Duplicates are collapsed before the query
+        self.assertEqual(len(mock_get_users.await_args.args[0]), 2)
+
+    def test_batch_limit(self):
+        response = self.client.post("/users/batch", json={"ids": [str(uuid4()) for _ in range(101)]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_requires_internal_token(self):
+        response = self.client.post("/users/batch", json={"ids": []}, headers={"X-Internal-Token": "wrong"})
+        self.assertEqual(response.status_code, 403)
+        with patch.object(settings, "INTERNAL_API_TOKEN", None):
+            response = self.client.post("/users/batch", json={"ids": []})
+        self.assertEqual(response.status_code, 403)
+
+    @patch("app.crud.get_revoked_sessions", new_callable=AsyncMock)
+    def test_revocations_require_internal_token(self, mock_get_revoked):
+        mock_get_revoked.return_value = []
+        response = self.client.get("/auth/revocations", headers={"X-Internal-Token": "wrong"})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get("/auth/revocations")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["sessions"], [])
+
+class TestSessionRevocation(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        revocations._revoked.clear()
+
+    async def test_revoked_session_rejected_without_db(self):
+        session_id = str(uuid4())
+        token = create_access_token("123", session_id=session_id)
+        self.assertEqual(await validate_user_token(token), "123")
+
+        revocations.add(session_id, datetime.utcnow() + timedelta(minutes=30))
+        with self.assertRaises(HTTPException) as context:
+            await validate_user_token(token)
+        self.assertEqual(context.exception.detail, "Session revoked")
+
+    @patch("app.sessions.crud.get_revoked_sessions", new_callable=AsyncMock)
+    async def test_refresh_is_incremental_and_drops_expired(self, mock_get_revoked):
+        now = datetime.utcnow()
+        active, expired = uuid4(), uuid4()
+        mock_get_revoked.return_value = [
+            (active, now + timedelta(minutes=10), now - timedelta(seconds=5)),
+            (expired, now - timedelta(minutes=1), now - timedelta(minutes=2)),
+        ]
+        revocation_list = RevocationList()
+        await revocation_list.refresh()
+        mock_get_revoked.assert_awaited_with(None)
+        self.assertIn(str(active), revocation_list)
+        self.assertNotIn(str(expired), revocation_list)
+
+        mock_get_revoked.return_value = []
+        await revocation_list.refresh()
+        since = mock_get_revoked.await_args.args[0]
+        self.assertLess(since, now - timedelta(seconds=5))
+        self.assertIn(str(active), revocation_list)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file